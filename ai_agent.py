@@ -1,12 +1,24 @@
 import os
+import time
+import asyncio
 import logging
-from typing import Dict, Any, List, TypedDict, Optional
-from openai import OpenAI
+import functools
+import hashlib
+import itertools
+import re
+import sys
+from typing import Dict, Any, List, TypedDict, Optional, Union, Callable, Tuple
+import httpx
+import orjson
+import tiktoken
+from cachetools import TTLCache
+from openai import AsyncOpenAI, RateLimitError
 from openai.types.chat import ChatCompletion
-from dotenv import load_dotenv
 from datetime import datetime
 from pydantic import BaseModel, Field
 import json
+from semantic_cache import SemanticCache
+from src.utils.env import load_env
 
 logger = logging.getLogger(__name__)
 
@@ -20,32 +32,216 @@ class CaseAnalysis(BaseModel):
     confidence: float = Field(..., ge=0.0, le=1.0)
     analysis_timestamp: datetime = Field(default_factory=datetime.now)
 
+def _analysis_response_schema() -> Dict[str, Any]:
+    """Build a strict JSON schema for the fields GPT must return.
+    
+    Strict structured outputs require every property to be listed as required
+    and reject numeric range keywords, so the schema is derived from
+    CaseAnalysis without the locally populated timestamp or range bounds.
+    Ranges are still enforced by CaseAnalysis when the response is validated.
+    
+    Returns:
+        Dict[str, Any]: JSON schema for the structured response
+    """
+    schema = CaseAnalysis.model_json_schema()
+    properties = {}
+    for name, prop in schema["properties"].items():
+        if name == "analysis_timestamp":
+            continue
+        properties[name] = {
+            key: value for key, value in prop.items()
+            if key not in ("title", "default", "minimum", "maximum")
+        }
+    return {
+        "type": "object",
+        "properties": properties,
+        "required": list(properties),
+        "additionalProperties": False
+    }
+
+ANALYSIS_RESPONSE_FORMAT = {
+    "type": "json_schema",
+    "json_schema": {
+        "name": "CaseAnalysis",
+        "schema": _analysis_response_schema(),
+        "strict": True
+    }
+}
+
+# Static instructions sent as the system message on every request. Keeping
+# them identical across calls, ahead of the per-case content, lets OpenAI
+# serve the shared prefix from its prompt cache.
+ANALYSIS_SYSTEM_PROMPT = """You are a security analyst AI assistant working in a security operations center (SOC).
+You will be given a single security case exported from the SOC platform. Analyze the case
+and return a structured analysis as a JSON object with exactly the following fields:
+
+- risk_level: integer from 0 to 10. 0 means benign or a confirmed false positive, 1-3 low
+  risk, 4-6 moderate risk that warrants review, 7-8 high risk with likely malicious activity,
+  9-10 critical risk such as active compromise, data exfiltration or ransomware.
+- needs_investigation: boolean. True when a human analyst must review the case before it can
+  be closed, for example when evidence is ambiguous, the risk level is 7 or above, or any
+  recommended manual action is required.
+- risk_factors: list of strings. Each entry names one concrete observation from the case that
+  raises risk, such as a suspicious process, an unusual login location, lateral movement, a
+  known malicious indicator or a privileged account involved.
+- automated_actions: list of strings. Containment or enrichment steps that are safe to run
+  without human approval, such as enriching indicators, collecting additional logs or
+  tagging the case.
+- manual_actions: list of strings. Steps that require an analyst, such as isolating a host,
+  disabling an account, contacting the asset owner or escalating to incident response.
+- confidence: number from 0.0 to 1.0 expressing how well the available case data supports
+  the assessment.
+
+Guidelines:
+1. Base the assessment only on the case data provided; do not invent indicators.
+2. Weigh the platform severity and status, but adjust the risk level when the summary
+   supports a different conclusion.
+3. Prefer specific, actionable entries over generic advice, and keep each entry short.
+4. Return empty lists rather than placeholder text when nothing applies.
+5. Lower the confidence when the case summary is missing or incomplete.
+
+Be specific and concise. Format your response as JSON."""
+
+OPTIMIZATION_SYSTEM_PROMPT = """You are a performance engineer reviewing the metrics of an automated SOC
+case-processing workflow. Identify bottlenecks and recommend configuration changes.
+Respond with a JSON object with the following fields:
+- bottlenecks: list of strings, each describing one bottleneck
+- recommendations: list of objects with "priority" ("high", "medium" or "low"),
+  "description" and "expected_impact" strings
+- summary: one-sentence summary of the assessment"""
+
+# Matches a fully streamed risk_level value in a partial JSON response
+_RISK_LEVEL_PATTERN = re.compile(r'"risk_level"\s*:\s*(\d+)\s*[,}]')
+
+# Per-case user prompt; built once so each call is a single str.format
+ANALYSIS_PROMPT_TEMPLATE = """Please analyze this security case:
+ID: {id}
+Title: {title}
+Severity: {severity}
+Status: {status}
+Summary: {summary}
+Tenant: {tenant}
+
+Alerts ({alert_count} total):
+{alerts}
+
+Activities:
+{activities}"""
+
+# Connection pool limits for the shared HTTP client
+MAX_CONNECTIONS = 100
+MAX_KEEPALIVE_CONNECTIONS = 50
+
+# Process-wide OpenAI clients, one per API key
+_openai_clients: Dict[str, AsyncOpenAI] = {}
+
+def _openai_client(api_key: str) -> AsyncOpenAI:
+    """Get the process-wide OpenAI client for an API key.
+
+    Args:
+        api_key: OpenAI API key
+
+    Returns:
+        AsyncOpenAI: Client backed by a pooled HTTP connection
+    """
+    client = _openai_clients.get(api_key)
+    if client is None:
+        http_client = httpx.AsyncClient(
+            limits=httpx.Limits(
+                max_connections=MAX_CONNECTIONS,
+                max_keepalive_connections=MAX_KEEPALIVE_CONNECTIONS
+            )
+        )
+        client = _openai_clients[api_key] = AsyncOpenAI(api_key=api_key, http_client=http_client)
+    return client
+
+async def close_openai_clients() -> None:
+    """Close the shared OpenAI clients and their connection pools.
+
+    Every AIAgent uses these clients, so call this once at process shutdown,
+    after the last agent is done; agents created afterwards get fresh clients.
+    """
+    clients = list(_openai_clients.values())
+    _openai_clients.clear()
+    await asyncio.gather(*(client.close() for client in clients))
+
+@functools.lru_cache(maxsize=None)
+def _encoding_for_model(model: str) -> tiktoken.Encoding:
+    """Get the tiktoken encoding for a model, loading its BPE file once."""
+    return tiktoken.encoding_for_model(model)
+
+@functools.lru_cache(maxsize=32)
+def _system_prompt_tokens(encoding: tiktoken.Encoding, system_prompt: str) -> int:
+    """Count a system prompt's tokens once per encoding rather than per case."""
+    return len(encoding.encode(system_prompt))
+
 class AIAgent:
     """AI agent for analyzing security cases using OpenAI's GPT models."""
 
-    def __init__(self):
+    EMBEDDING_MODEL = "text-embedding-3-small"
+    
+    # Upper bounds on per-case detail included in the prompt
+    MAX_PROMPT_ALERTS = 20
+    MAX_PROMPT_ACTIVITIES = 20
+
+    # Completion budget and context windows used to size max_tokens
+    MAX_COMPLETION_TOKENS = 1000
+    CONTEXT_WINDOWS = {"gpt-4": 8192, "gpt-4o": 128000, "gpt-4o-mini": 128000}
+    DEFAULT_CONTEXT_WINDOW = 8192
+    CONTEXT_SAFETY_MARGIN = 64
+    
+    # Models accepting a strict json_schema response_format; others get JSON mode
+    STRUCTURED_OUTPUT_MODELS = {
+        "gpt-4o", "gpt-4o-2024-08-06", "gpt-4o-2024-11-20",
+        "gpt-4o-mini", "gpt-4o-mini-2024-07-18"
+    }
+    
+    # Optimization recommendations are reused while metrics are unchanged
+    OPTIMIZATION_CACHE_SIZE = 128
+    OPTIMIZATION_CACHE_TTL = 300
+    
+    # Short, low-severity cases are routed to the light model when one is set
+    LIGHT_MODEL_SEVERITIES = {"low", "informational"}
+    LIGHT_MODEL_MAX_PROMPT_TOKENS = 1500
+
+    def __init__(
+        self,
+        concurrency: int = 20,
+        semantic_cache: Optional[SemanticCache] = None,
+        light_model: Optional[str] = None
+    ):
         """Initialize the AI agent with OpenAI client and configuration.
         
+        The async client is shared by every agent in the process using the
+        same API key, so the HTTPS connection pool is reused across calls.
+        
+        Args:
+            concurrency: Maximum number of GPT requests in flight at once
+            semantic_cache: Optional cache used to reuse analyses of near-duplicate cases
+            light_model: Optional cheaper model (e.g. "gpt-4o-mini") used for
+                short, low-severity cases
+        
         Raises:
             ValueError: If OpenAI API key is missing
             RuntimeError: If initialization fails
         """
         try:
-            load_dotenv()
+            load_env()
             api_key = os.getenv("OPENAI_API_KEY")
             if not api_key:
                 raise ValueError("Missing OpenAI API key")
             
-            self.client = OpenAI(api_key=api_key)
-            self.model = "gpt-4"
-            self.system_prompt = """You are a security analyst AI assistant. Analyze the security case 
-                provided and return a structured analysis including:
-                1. Risk level (0-10)
-                2. Whether human investigation is needed (true/false)
-                3. Risk factors identified (list)
-                4. Recommended automated actions (list)
-                5. Recommended manual actions (list)
-                Be specific and concise. Format your response as JSON."""
+            self.client = _openai_client(api_key)
+            self.model = "gpt-4o"
+            self.light_model = light_model
+            self._optimization_cache = TTLCache(
+                maxsize=self.OPTIMIZATION_CACHE_SIZE,
+                ttl=self.OPTIMIZATION_CACHE_TTL
+            )
+            self.concurrency = concurrency
+            self._semaphore = asyncio.Semaphore(concurrency)
+            self.semantic_cache = semantic_cache
+            self.system_prompt = ANALYSIS_SYSTEM_PROMPT
             
             logger.info("AI Agent initialized successfully")
             
@@ -53,11 +249,17 @@ class AIAgent:
             logger.error(f"Failed to initialize AI Agent: {str(e)}")
             raise RuntimeError(f"AI Agent initialization failed: {str(e)}") from e
 
-    async def analyze_case(self, case_data: Dict[str, Any]) -> CaseAnalysis:
+    async def analyze_case(
+        self,
+        case_data: Dict[str, Any],
+        on_risk_level: Optional[Callable[[int], None]] = None
+    ) -> CaseAnalysis:
         """Analyze a case using GPT to determine severity, priority, and recommended actions.
         
         Args:
             case_data: Dictionary containing case information
+            on_risk_level: Optional callback invoked with the risk level as soon
+                as it is streamed, before the rest of the analysis arrives
             
         Returns:
             CaseAnalysis: Structured analysis results
@@ -73,14 +275,33 @@ class AIAgent:
             # Prepare the case summary for analysis
             case_summary = self._prepare_case_summary(case_data)
             
+            # Reuse the analysis of a near-identical case if one is cached
+            embedding = None
+            if self.semantic_cache is not None:
+                embedding = await self._embed(self._cache_text(case_summary))
+                cached = self.semantic_cache.lookup(embedding)
+                if cached is not None:
+                    logger.info(f"Semantic cache hit for case {case_data.get('external_id', 'unknown')}")
+                    analysis = CaseAnalysis(**cached)
+                    if on_risk_level is not None:
+                        on_risk_level(analysis.risk_level)
+                    return analysis
+            
             # Create analysis prompt
             prompt = self._create_analysis_prompt(case_summary)
+            model, prompt_tokens = self._select_model(case_summary, prompt)
             
             # Get analysis from GPT
-            response = await self._get_gpt_analysis(prompt)
+            content = await self._get_gpt_analysis(prompt, on_risk_level, model, prompt_tokens)
             
             # Parse and structure the response
-            analysis = self._parse_analysis_response(response)
+            analysis = self._parse_analysis_response(content)
+            
+            if embedding is not None:
+                self.semantic_cache.add(
+                    embedding,
+                    analysis.model_dump(mode="json", exclude={"analysis_timestamp"})
+                )
             
             logger.info(f"Successfully analyzed case {case_data.get('external_id', 'unknown')}")
             return analysis
@@ -89,6 +310,197 @@ class AIAgent:
             logger.error(f"Error analyzing case: {str(e)}")
             raise RuntimeError(f"Case analysis failed: {str(e)}") from e
 
+    async def analyze_cases(self, cases: List[Dict[str, Any]]) -> List[Union[CaseAnalysis, Exception]]:
+        """Analyze many cases concurrently.
+        
+        GPT requests are fanned out and bounded by the agent's concurrency
+        limit, so wall time tracks the slowest request rather than the sum.
+        
+        Args:
+            cases: List of case data dictionaries
+            
+        Returns:
+            List[Union[CaseAnalysis, Exception]]: One entry per input case, in
+            order; failed cases are returned as their exception
+        """
+        return await asyncio.gather(
+            *(self.analyze_case(case) for case in cases),
+            return_exceptions=True
+        )
+
+    async def submit_case_batch(self, cases: List[Dict[str, Any]]) -> str:
+        """Submit cases for offline analysis through the OpenAI Batch API.
+        
+        Batch requests are billed at a discount and complete within 24 hours,
+        which suits backlog triage where latency does not matter.
+        
+        Args:
+            cases: List of case data dictionaries
+            
+        Returns:
+            str: ID of the created batch
+            
+        Raises:
+            ValueError: If any case is invalid
+            RuntimeError: If the batch submission fails
+        """
+        if not cases:
+            raise ValueError("No cases to submit")
+            
+        lines = []
+        for case_data in cases:
+            case_summary = self._prepare_case_summary(case_data)
+            prompt = self._create_analysis_prompt(case_summary)
+            model, prompt_tokens = self._select_model(case_summary, prompt)
+            lines.append(orjson.dumps({
+                "custom_id": case_data["external_id"],
+                "method": "POST",
+                "url": "/v1/chat/completions",
+                "body": self._completion_params(prompt, model, prompt_tokens)
+            }))
+            
+        try:
+            batch_file = await self.client.files.create(
+                file=("case_batch.jsonl", b"\n".join(lines)),
+                purpose="batch"
+            )
+            batch = await self.client.batches.create(
+                input_file_id=batch_file.id,
+                endpoint="/v1/chat/completions",
+                completion_window="24h"
+            )
+            logger.info(f"Submitted batch {batch.id} with {len(lines)} cases")
+            return batch.id
+            
+        except Exception as e:
+            logger.error(f"Batch submission failed: {str(e)}")
+            raise RuntimeError(f"Batch submission failed: {str(e)}") from e
+
+    async def get_batch_status(self, batch_id: str) -> str:
+        """Get the status of a submitted batch.
+        
+        Args:
+            batch_id: ID returned by submit_case_batch
+            
+        Returns:
+            str: Batch status (e.g. 'in_progress', 'completed', 'failed')
+        """
+        batch = await self.client.batches.retrieve(batch_id)
+        return batch.status
+
+    async def fetch_batch_results(self, batch_id: str) -> Dict[str, CaseAnalysis]:
+        """Download and parse the results of a completed batch.
+        
+        Args:
+            batch_id: ID returned by submit_case_batch
+            
+        Returns:
+            Dict[str, CaseAnalysis]: Analyses keyed by case external ID; cases
+            whose request failed or could not be parsed are omitted
+            
+        Raises:
+            RuntimeError: If the batch has not completed
+        """
+        batch = await self.client.batches.retrieve(batch_id)
+        if batch.status != "completed" or not batch.output_file_id:
+            raise RuntimeError(f"Batch {batch_id} is not complete (status: {batch.status})")
+            
+        output = await self.client.files.content(batch.output_file_id)
+        
+        results = {}
+        for line in output.content.splitlines():
+            if not line.strip():
+                continue
+            record = orjson.loads(line)
+            case_id = record.get("custom_id")
+            response = record.get("response") or {}
+            if record.get("error") or response.get("status_code") != 200:
+                logger.error(f"Batch request for case {case_id} failed: {record.get('error')}")
+                continue
+            try:
+                completion = ChatCompletion.model_validate(response["body"])
+                results[case_id] = self._parse_analysis_response(completion.choices[0].message.content)
+            except Exception as e:
+                logger.error(f"Failed to parse batch result for case {case_id}: {str(e)}")
+                
+        logger.info(f"Fetched {len(results)} analyses from batch {batch_id}")
+        return results
+
+    async def get_optimization_recommendations(self, metrics: Dict[str, Any]) -> Dict[str, Any]:
+        """Get GPT recommendations for optimizing a workflow stage.
+        
+        Results are memoized on a hash of the metrics for a few minutes, so
+        repeated checks of an unchanged snapshot skip the GPT round trip.
+        
+        Args:
+            metrics: Stage name, optimization focus and performance metrics
+            
+        Returns:
+            Dict[str, Any]: Bottlenecks, prioritized recommendations and a summary
+            
+        Raises:
+            RuntimeError: If the GPT call or parsing fails
+        """
+        key = hashlib.blake2b(
+            orjson.dumps(metrics, option=orjson.OPT_SORT_KEYS, default=str)
+        ).hexdigest()
+        cached = self._optimization_cache.get(key)
+        if cached is not None:
+            return cached
+            
+        try:
+            async with self._semaphore:
+                response = await self.client.chat.completions.create(
+                    model=self.model,
+                    messages=[
+                        {"role": "system", "content": OPTIMIZATION_SYSTEM_PROMPT},
+                        {"role": "user", "content": orjson.dumps(metrics, default=str).decode()}
+                    ],
+                    temperature=0.3,
+                    max_tokens=self.MAX_COMPLETION_TOKENS,
+                    response_format={"type": "json_object"}
+                )
+            recommendations = self._parse_optimization_response(response.choices[0].message.content)
+            
+        except Exception as e:
+            logger.error(f"Failed to get optimization recommendations: {str(e)}")
+            raise RuntimeError(f"Optimization recommendations failed: {str(e)}") from e
+            
+        self._optimization_cache[key] = recommendations
+        return recommendations
+
+    def _parse_optimization_response(self, content: Optional[str]) -> Dict[str, Any]:
+        """Parse GPT optimization recommendations.
+        
+        Args:
+            content: GPT response content
+            
+        Returns:
+            Dict[str, Any]: Bottlenecks, recommendations and summary
+            
+        Raises:
+            ValueError: If the response is empty or not a JSON object
+        """
+        if not content:
+            raise ValueError("Empty response from GPT")
+        data = orjson.loads(content)
+        if not isinstance(data, dict):
+            raise ValueError("Optimization response is not a JSON object")
+            
+        return {
+            "bottlenecks": [str(item) for item in data.get("bottlenecks", [])],
+            "recommendations": [
+                {
+                    "priority": str(rec.get("priority", "medium")).lower(),
+                    "description": rec.get("description", ""),
+                    "expected_impact": rec.get("expected_impact", "")
+                }
+                for rec in data.get("recommendations", [])
+                if isinstance(rec, dict)
+            ],
+            "summary": data.get("summary", "")
+        }
+
     def _prepare_case_summary(self, case_data: Dict[str, Any]) -> Dict[str, Any]:
         """Prepare a summary of the case for analysis.
         
@@ -106,6 +518,10 @@ class AIAgent:
         if missing_fields:
             raise ValueError(f"Missing required case fields: {missing_fields}")
             
+        # The collector shares its alert list by reference; read it in place
+        # rather than slicing a copy
+        alerts = case_data.get("alerts", [])
+        prompt_alerts = tuple(itertools.islice(alerts, self.MAX_PROMPT_ALERTS))
         return {
             "id": case_data.get("external_id"),
             "title": case_data.get("title"),
@@ -114,67 +530,253 @@ class AIAgent:
             "summary": case_data.get("summary", ""),
             "metadata": case_data.get("metadata", {}),
             "created_at": case_data.get("created_at", ""),
-            "tenant": case_data.get("tenant_name", "")
+            "tenant": case_data.get("tenant_name", ""),
+            # Alert fields are kept as parallel tuples of interned strings since
+            # the same detectors fire across many cases
+            "alert_titles": tuple(sys.intern(str(alert.get("title"))) for alert in prompt_alerts),
+            "alert_severities": tuple(sys.intern(str(alert.get("severity"))) for alert in prompt_alerts),
+            "alert_count": len(alerts),
+            "activities": [
+                activity.get("description", "No description")
+                for activity in case_data.get("activities", [])[:self.MAX_PROMPT_ACTIVITIES]
+            ]
         }
 
+    @staticmethod
+    @functools.lru_cache(maxsize=1024)
+    def _format_alerts(titles: Tuple[str, ...], severities: Tuple[str, ...]) -> str:
+        """Format alerts as a bulleted list for the prompt.
+        
+        Cached on the alert tuples so repeated alert sets are formatted once.
+        """
+        return "\n".join(
+            f"- {title} (Severity: {severity})" for title, severity in zip(titles, severities)
+        ) or "No alerts"
+
+    def _format_activities(self, activities: List[str]) -> str:
+        """Format activity descriptions as a bulleted list for the prompt."""
+        return "\n".join(f"- {description}" for description in activities) or "No activities"
+
     def _create_analysis_prompt(self, case_summary: Dict[str, Any]) -> str:
         """Create a prompt for GPT analysis.
         
+        Only per-case fields are included; the analysis instructions live in
+        the system prompt so the request prefix is cacheable.
+        
         Args:
             case_summary: Structured case summary
             
         Returns:
             str: Formatted prompt for GPT
         """
-        return f"""Please analyze this security case:
-        ID: {case_summary['id']}
-        Title: {case_summary['title']}
-        Severity: {case_summary['severity']}
-        Status: {case_summary['status']}
-        Summary: {case_summary['summary']}
-        Tenant: {case_summary['tenant']}
-        
-        Provide a structured analysis in JSON format with the following fields:
-        - risk_level (0-10)
-        - needs_investigation (boolean)
-        - risk_factors (list of strings)
-        - automated_actions (list of strings)
-        - manual_actions (list of strings)
-        - confidence (0.0-1.0)"""
-
-    async def _get_gpt_analysis(self, prompt: str) -> ChatCompletion:
+        summary = case_summary['summary']
+        if isinstance(summary, dict):
+            # Stable key order keeps identical cases byte-identical
+            summary = json.dumps(summary, sort_keys=True)
+            
+        return ANALYSIS_PROMPT_TEMPLATE.format(
+            id=case_summary['id'],
+            title=case_summary['title'],
+            severity=case_summary['severity'],
+            status=case_summary['status'],
+            summary=summary,
+            tenant=case_summary['tenant'],
+            alert_count=case_summary['alert_count'],
+            alerts=self._format_alerts(case_summary['alert_titles'], case_summary['alert_severities']),
+            activities=self._format_activities(case_summary['activities'])
+        )
+
+    def _cache_text(self, case_summary: Dict[str, Any]) -> str:
+        """Build the text embedded for semantic cache lookups.
+        
+        Identifiers and timestamps are excluded so repeats of the same alert
+        pattern map to nearly identical embeddings.
+        
+        Args:
+            case_summary: Structured case summary
+            
+        Returns:
+            str: Canonical text representation of the case content
+        """
+        content = {
+            key: value for key, value in case_summary.items()
+            if key not in ("id", "created_at", "metadata")
+        }
+        return json.dumps(content, sort_keys=True, default=str)
+
+    async def _embed(self, text: str) -> List[float]:
+        """Get an embedding vector for text.
+        
+        Args:
+            text: Text to embed
+            
+        Returns:
+            List[float]: Embedding vector
+        """
+        response = await self.client.embeddings.create(
+            model=self.EMBEDDING_MODEL,
+            input=text
+        )
+        return response.data[0].embedding
+
+    def _count_prompt_tokens(self, prompt: str, model: str) -> int:
+        """Count the tokens of the system and user messages for a prompt.
+        
+        Args:
+            prompt: Analysis prompt
+            model: Model the prompt will be sent to
+            
+        Returns:
+            int: Prompt tokens including per-message overhead
+        """
+        encoding = _encoding_for_model(model)
+        return (
+            _system_prompt_tokens(encoding, self.system_prompt) +
+            len(encoding.encode(prompt)) +
+            8
+        )
+
+    def _select_model(self, case_summary: Dict[str, Any], prompt: str) -> Tuple[str, int]:
+        """Pick the model for a case.
+        
+        Args:
+            case_summary: Structured case summary
+            prompt: Analysis prompt
+            
+        Returns:
+            Tuple[str, int]: Light model for short, low-severity cases, otherwise
+            the default model, and the prompt's token count for that model
+        """
+        prompt_tokens = None
+        if (self.light_model and
+                str(case_summary.get("severity", "")).lower() in self.LIGHT_MODEL_SEVERITIES):
+            prompt_tokens = self._count_prompt_tokens(prompt, self.light_model)
+            if prompt_tokens <= self.LIGHT_MODEL_MAX_PROMPT_TOKENS:
+                return self.light_model, prompt_tokens
+            # The count carries over unless the default model tokenizes differently
+            if _encoding_for_model(self.light_model) is not _encoding_for_model(self.model):
+                prompt_tokens = None
+        if prompt_tokens is None:
+            prompt_tokens = self._count_prompt_tokens(prompt, self.model)
+        return self.model, prompt_tokens
+
+    def _completion_params(
+        self,
+        prompt: str,
+        model: Optional[str] = None,
+        prompt_tokens: Optional[int] = None
+    ) -> Dict[str, Any]:
+        """Build the chat completion request body for a prompt.
+        
+        max_tokens is capped by the room left in the model's context window,
+        so the quota reserved per request tracks the actual prompt size.
+        
+        Args:
+            prompt: Analysis prompt
+            model: Model to use; defaults to the agent's model
+            prompt_tokens: Prompt token count for the model, if already known
+            
+        Returns:
+            Dict[str, Any]: Keyword arguments for chat.completions.create
+            
+        Raises:
+            ValueError: If the prompt does not fit in the model's context window
+        """
+        model = model or self.model
+        if prompt_tokens is None:
+            prompt_tokens = self._count_prompt_tokens(prompt, model)
+        context_window = self.CONTEXT_WINDOWS.get(model, self.DEFAULT_CONTEXT_WINDOW)
+        available = (
+            context_window -
+            prompt_tokens -
+            self.CONTEXT_SAFETY_MARGIN
+        )
+        if available <= 0:
+            raise ValueError(f"Prompt exceeds the {model} context window")
+            
+        return {
+            "model": model,
+            "messages": [
+                {"role": "system", "content": self.system_prompt},
+                {"role": "user", "content": prompt}
+            ],
+            "temperature": 0.3,
+            "max_tokens": min(self.MAX_COMPLETION_TOKENS, available),
+            "response_format": (
+                ANALYSIS_RESPONSE_FORMAT if model in self.STRUCTURED_OUTPUT_MODELS
+                else {"type": "json_object"}
+            )
+        }
+
+    async def _stream_completion(
+        self,
+        params: Dict[str, Any],
+        on_risk_level: Optional[Callable[[int], None]] = None
+    ) -> str:
+        """Stream a chat completion and collect its content.
+        
+        Args:
+            params: Chat completion request parameters
+            on_risk_level: Optional callback invoked once the risk level has
+                been streamed
+            
+        Returns:
+            str: Full completion content
+        """
+        chunks = []
+        risk_level_reported = on_risk_level is None
+        stream = await self.client.chat.completions.create(**params, stream=True)
+        async for chunk in stream:
+            if not chunk.choices:
+                continue
+            delta = chunk.choices[0].delta.content
+            if not delta:
+                continue
+            chunks.append(delta)
+            if not risk_level_reported:
+                match = _RISK_LEVEL_PATTERN.search("".join(chunks))
+                if match:
+                    risk_level_reported = True
+                    on_risk_level(int(match.group(1)))
+        return "".join(chunks)
+
+    async def _get_gpt_analysis(
+        self,
+        prompt: str,
+        on_risk_level: Optional[Callable[[int], None]] = None,
+        model: Optional[str] = None,
+        prompt_tokens: Optional[int] = None
+    ) -> str:
         """Get analysis from GPT model.
         
         Args:
             prompt: Analysis prompt
+            on_risk_level: Optional callback invoked once the risk level has
+                been streamed
+            model: Model to use; defaults to the agent's model
+            prompt_tokens: Prompt token count for the model, if already known
             
         Returns:
-            ChatCompletion: GPT response
+            str: GPT response content
             
         Raises:
             RuntimeError: If GPT call fails
         """
         try:
-            response = await self.client.chat.completions.create(
-                model=self.model,
-                messages=[
-                    {"role": "system", "content": self.system_prompt},
-                    {"role": "user", "content": prompt}
-                ],
-                temperature=0.3,
-                max_tokens=1000
-            )
-            return response
+            async with self._semaphore:
+                return await self._stream_completion(
+                    self._completion_params(prompt, model, prompt_tokens), on_risk_level
+                )
             
         except Exception as e:
             logger.error(f"GPT analysis failed: {str(e)}")
             raise RuntimeError(f"GPT analysis failed: {str(e)}") from e
 
-    def _parse_analysis_response(self, response: ChatCompletion) -> CaseAnalysis:
+    def _parse_analysis_response(self, content: Optional[str]) -> CaseAnalysis:
         """Parse GPT response into structured analysis.
         
         Args:
-            response: GPT completion response
+            content: GPT response content
             
         Returns:
             CaseAnalysis: Structured analysis results
@@ -183,23 +785,166 @@ class AIAgent:
             ValueError: If response parsing fails
         """
         try:
-            content = response.choices[0].message.content
             if not content:
                 raise ValueError("Empty response from GPT")
                 
-            # Parse JSON response
-            analysis_dict = json.loads(content)
-            
-            # Validate and create CaseAnalysis object
-            return CaseAnalysis(
-                risk_level=analysis_dict["risk_level"],
-                needs_investigation=analysis_dict["needs_investigation"],
-                risk_factors=analysis_dict["risk_factors"],
-                automated_actions=analysis_dict["automated_actions"],
-                manual_actions=analysis_dict["manual_actions"],
-                confidence=analysis_dict.get("confidence", 0.8)
-            )
+            # Structured output models are constrained to the CaseAnalysis
+            # schema; JSON mode responses are checked against it here
+            return CaseAnalysis.model_validate_json(content)
             
         except Exception as e:
             logger.error(f"Failed to parse GPT response: {str(e)}")
             raise ValueError(f"Failed to parse GPT response: {str(e)}") from e
+
+
+class RateLimitedAIAgent(AIAgent):
+    """AI agent that throttles GPT requests to stay within OpenAI rate limits.
+
+    Request and token capacity are tracked per minute and refilled
+    continuously, so fan-out saturates the account quota without tripping
+    429 responses. When a 429 does occur the effective limits are halved and
+    the request is retried with exponential backoff; successful requests
+    slowly restore the limits to their configured values.
+    """
+
+    def __init__(
+        self,
+        max_requests_per_minute: int = 500,
+        max_tokens_per_minute: int = 40000,
+        concurrency: int = 20,
+        max_attempts: int = 5,
+        light_model: Optional[str] = None
+    ):
+        """Initialize the rate-limited AI agent.
+        
+        Args:
+            max_requests_per_minute: Account request quota (RPM)
+            max_tokens_per_minute: Account token quota (TPM)
+            concurrency: Maximum number of GPT requests in flight at once
+            max_attempts: Maximum attempts per request when rate limited
+            light_model: Optional cheaper model used for short, low-severity cases
+        """
+        super().__init__(concurrency=concurrency, light_model=light_model)
+        # Rate limits are handled here, so disable the SDK's own 429 retries
+        self.client = self.client.with_options(max_retries=0)
+        self.max_requests_per_minute = max_requests_per_minute
+        self.max_tokens_per_minute = max_tokens_per_minute
+        self.max_attempts = max_attempts
+        self.requests_per_minute = float(max_requests_per_minute)
+        self.tokens_per_minute = float(max_tokens_per_minute)
+        self.available_request_capacity = float(max_requests_per_minute)
+        self.available_token_capacity = float(max_tokens_per_minute)
+        self._last_refill = time.monotonic()
+        self._capacity_lock = asyncio.Lock()
+
+    def _estimate_tokens(self, params: Dict[str, Any], prompt_tokens: int) -> int:
+        """Estimate the tokens a request will consume against the TPM quota.
+        
+        Args:
+            params: Chat completion request parameters
+            prompt_tokens: Prompt token count for the request's model
+            
+        Returns:
+            int: Prompt tokens plus the completion token budget
+        """
+        return prompt_tokens + params.get("max_tokens", 0)
+
+    def _refill_capacity(self) -> None:
+        """Refill request and token capacity for the time elapsed."""
+        now = time.monotonic()
+        elapsed = now - self._last_refill
+        self._last_refill = now
+        self.available_request_capacity = min(
+            self.requests_per_minute,
+            self.available_request_capacity + self.requests_per_minute * elapsed / 60
+        )
+        self.available_token_capacity = min(
+            self.tokens_per_minute,
+            self.available_token_capacity + self.tokens_per_minute * elapsed / 60
+        )
+
+    async def _acquire_capacity(self, token_estimate: int) -> None:
+        """Wait until there is capacity for one request of the given size.
+        
+        Args:
+            token_estimate: Estimated tokens consumed by the request
+        """
+        while True:
+            async with self._capacity_lock:
+                self._refill_capacity()
+                # A request larger than the whole bucket could never be admitted;
+                # the bucket shrinks after a 429, so cap against the current limit
+                tokens = min(token_estimate, int(self.tokens_per_minute))
+                if (self.available_request_capacity >= 1 and
+                        self.available_token_capacity >= tokens):
+                    self.available_request_capacity -= 1
+                    self.available_token_capacity -= tokens
+                    return
+                wait_time = max(
+                    (1 - self.available_request_capacity) * 60 / self.requests_per_minute,
+                    (tokens - self.available_token_capacity) * 60 / self.tokens_per_minute,
+                    0.01
+                )
+            await asyncio.sleep(wait_time)
+
+    def _on_rate_limited(self) -> None:
+        """Halve the effective rate limits after a 429 response."""
+        self.requests_per_minute = max(1.0, self.requests_per_minute / 2)
+        self.tokens_per_minute = max(1.0, self.tokens_per_minute / 2)
+        self.available_request_capacity = min(self.available_request_capacity, self.requests_per_minute)
+        self.available_token_capacity = min(self.available_token_capacity, self.tokens_per_minute)
+
+    def _on_success(self) -> None:
+        """Gradually restore the effective rate limits after a success."""
+        self.requests_per_minute = min(self.max_requests_per_minute, self.requests_per_minute * 1.05)
+        self.tokens_per_minute = min(self.max_tokens_per_minute, self.tokens_per_minute * 1.05)
+
+    async def _get_gpt_analysis(
+        self,
+        prompt: str,
+        on_risk_level: Optional[Callable[[int], None]] = None,
+        model: Optional[str] = None,
+        prompt_tokens: Optional[int] = None
+    ) -> str:
+        """Get analysis from GPT model within the configured rate limits.
+        
+        Args:
+            prompt: Analysis prompt
+            on_risk_level: Optional callback invoked once the risk level has
+                been streamed
+            model: Model to use; defaults to the agent's model
+            prompt_tokens: Prompt token count for the model, if already known
+            
+        Returns:
+            str: GPT response content
+            
+        Raises:
+            RuntimeError: If GPT call fails or rate limit retries are exhausted
+        """
+        if prompt_tokens is None:
+            prompt_tokens = self._count_prompt_tokens(prompt, model or self.model)
+        params = self._completion_params(prompt, model, prompt_tokens)
+        token_estimate = self._estimate_tokens(params, prompt_tokens)
+        
+        for attempt in range(self.max_attempts):
+            await self._acquire_capacity(token_estimate)
+            try:
+                async with self._semaphore:
+                    content = await self._stream_completion(params, on_risk_level)
+                self._on_success()
+                return content
+                
+            except RateLimitError as e:
+                self._on_rate_limited()
+                delay = min(2 ** attempt, 60)
+                logger.warning(
+                    f"Rate limited by OpenAI (attempt {attempt + 1}/{self.max_attempts}), "
+                    f"retrying in {delay}s: {str(e)}"
+                )
+                await asyncio.sleep(delay)
+                
+            except Exception as e:
+                logger.error(f"GPT analysis failed: {str(e)}")
+                raise RuntimeError(f"GPT analysis failed: {str(e)}") from e
+                
+        raise RuntimeError(f"GPT analysis failed: rate limited after {self.max_attempts} attempts")
@@ -1,17 +1,98 @@
-import requests
-from tenacity import retry, stop_after_attempt, wait_exponential
-from typing import Dict, List, Optional, Any
+import asyncio
+import functools
+import httpx
+import orjson
+from cachetools import TTLCache
+from dataclasses import dataclass, field
+from tenacity import retry, retry_if_exception, stop_after_attempt, wait_random_exponential
+from typing import Dict, List, Optional, Any, AsyncIterator, Union
 from datetime import datetime, timedelta
 from auth import AuthManager
 import logging
 
 logger = logging.getLogger(__name__)
 
+def _is_retryable(exc: BaseException) -> bool:
+    """Check whether a failed request is worth retrying.
+    
+    Network errors, timeouts, 429s and 5xx responses are transient; other
+    4xx responses and malformed bodies will fail the same way again.
+    """
+    if isinstance(exc, httpx.HTTPStatusError):
+        status = exc.response.status_code
+        return status == 429 or status >= 500
+    return isinstance(exc, httpx.TransportError)
+
+# Jittered backoff keeps clients from retrying in lockstep after a shared outage
+retry_transient = retry(
+    retry=retry_if_exception(_is_retryable),
+    wait=wait_random_exponential(multiplier=0.5, max=30),
+    stop=stop_after_attempt(5),
+    reraise=True
+)
+
+@dataclass
+class Case:
+    """A case together with its summary, alerts and activities."""
+    case_id: str
+    details: Dict[str, Any]
+    summary: Dict[str, Any]
+    alerts: List[Dict[str, Any]] = field(default_factory=list)
+    activities: List[Dict[str, Any]] = field(default_factory=list)
+
 class APIClient:
-    def __init__(self, auth_manager: AuthManager):
+    MAX_CONCURRENT_REQUESTS = 32
+    
+    # Case reads are cached for half of the default 5 minute polling interval
+    CACHE_MAX_ENTRIES = 1024
+    CACHE_TTL_SECONDS = 150
+
+    def __init__(
+        self,
+        auth_manager: AuthManager,
+        verify: Union[bool, str] = True,
+        cache_ttl: float = CACHE_TTL_SECONDS
+    ):
+        """Initialize the API client.
+        
+        Args:
+            auth_manager: Manager providing access tokens
+            verify: TLS verification setting; True for the system CA bundle
+                or a path to a custom CA bundle
+            cache_ttl: Seconds that case reads are served from cache
+        """
         self.auth_manager = auth_manager
-        self.session = requests.Session()
-        self.session.verify = False  # For testing only
+        self._cache = TTLCache(maxsize=self.CACHE_MAX_ENTRIES, ttl=cache_ttl)
+        base_url = f"https://{auth_manager.host}/connect/api/v1"
+        # One HTTP/2 connection multiplexes concurrent requests to the API host
+        self.session = httpx.Client(
+            base_url=base_url,
+            http2=True,
+            verify=verify,
+            timeout=30.0,
+            limits=httpx.Limits(max_connections=64)
+        )
+        self.async_session = httpx.AsyncClient(
+            base_url=base_url,
+            http2=True,
+            verify=verify,
+            timeout=30.0,
+            limits=httpx.Limits(max_connections=64)
+        )
+        # Caps concurrent async requests to respect API limits
+        self._async_semaphore = asyncio.Semaphore(self.MAX_CONCURRENT_REQUESTS)
+        # Serializes forced token refreshes after a 401 so concurrent
+        # requests share one refresh; the generation marks each refresh
+        self._token_refresh_lock = asyncio.Lock()
+        self._token_generation = 0
+
+    def close(self) -> None:
+        """Close the underlying HTTP connection pool."""
+        self.session.close()
+
+    async def aclose(self) -> None:
+        """Close the async HTTP connection pool."""
+        await self.async_session.aclose()
         
     def _get_headers(self) -> Dict[str, str]:
         """Get headers with current valid token."""
@@ -21,32 +102,114 @@ class APIClient:
             "Content-Type": "application/json"
         }
 
-    @retry(
-        stop=stop_after_attempt(3),
-        wait=wait_exponential(multiplier=1)
-    )
+    @retry_transient
     def _make_request(self, method: str, endpoint: str, **kwargs) -> Dict:
         """Make an HTTP request to the API with retry logic."""
         if 'headers' not in kwargs:
             kwargs['headers'] = self._get_headers()
+        if 'json' in kwargs:
+            kwargs['content'] = orjson.dumps(kwargs.pop('json'))
             
-        url = f"https://{self.auth_manager.host}/connect/api/v1{endpoint}"
-        logger.info(f"Making request to: {url}")
+        logger.info("Making request to: %s", endpoint)
         
-        response = self.session.request(method, url, **kwargs)
+        response = self.session.request(method, endpoint, **kwargs)
         
         if response.status_code == 401:
-            # Token might be expired, force refresh and retry
+            # Tokens are refreshed ahead of expiry; this is a fallback for
+            # tokens revoked server-side. Force refresh and retry
             logger.info("Token expired, refreshing...")
             new_token = self.auth_manager._get_access_token()
             if new_token:
                 kwargs['headers'] = self._get_headers()
-                response = self.session.request(method, url, **kwargs)
+                response = self.session.request(method, endpoint, **kwargs)
             else:
                 raise Exception("Failed to refresh token")
             
         response.raise_for_status()
-        return response.json()
+        return orjson.loads(response.content)
+
+    async def _refresh_token_async(self, generation: int) -> None:
+        """Force a token refresh off the event loop after a 401.
+        
+        Args:
+            generation: Token generation the failed request was sent with;
+                if another request has refreshed since, its token is reused
+        """
+        async with self._token_refresh_lock:
+            if generation != self._token_generation:
+                return
+            new_token = await asyncio.to_thread(self.auth_manager._get_access_token)
+            if not new_token:
+                raise Exception("Failed to refresh token")
+            self._token_generation += 1
+
+    @retry_transient
+    async def _make_request_async(self, method: str, endpoint: str, **kwargs) -> Dict:
+        """Make an async HTTP request to the API with retry logic."""
+        # The auth manager is synchronous and may hit the token endpoint,
+        # so token calls run in a worker thread instead of on the event loop
+        generation = self._token_generation
+        if 'headers' not in kwargs:
+            kwargs['headers'] = await asyncio.to_thread(self._get_headers)
+        if 'json' in kwargs:
+            kwargs['content'] = orjson.dumps(kwargs.pop('json'))
+            
+        logger.info("Making async request to: %s", endpoint)
+        
+        async with self._async_semaphore:
+            response = await self.async_session.request(method, endpoint, **kwargs)
+            
+            if response.status_code == 401:
+                # Tokens are refreshed ahead of expiry; this is a fallback for
+                # tokens revoked server-side. Force refresh and retry
+                logger.info("Token expired, refreshing...")
+                await self._refresh_token_async(generation)
+                kwargs['headers'] = await asyncio.to_thread(self._get_headers)
+                response = await self.async_session.request(method, endpoint, **kwargs)
+            
+        response.raise_for_status()
+        return orjson.loads(response.content)
+
+    @staticmethod
+    def _cache_key(endpoint: str, params: Optional[Dict[str, Any]]) -> tuple:
+        """Build the cache key for a GET request."""
+        return (endpoint, tuple(sorted(params.items())) if params else ())
+
+    def _cached_get(self, endpoint: str, params: Optional[Dict[str, Any]] = None) -> Any:
+        """Make a GET request, serving repeats within the cache TTL from memory."""
+        key = self._cache_key(endpoint, params)
+        if key not in self._cache:
+            self._cache[key] = self._make_request("GET", endpoint, params=params)
+        return self._cache[key]
+
+    async def _cached_get_async(self, endpoint: str, params: Optional[Dict[str, Any]] = None) -> Any:
+        """Make an async GET request, serving repeats within the cache TTL from memory."""
+        key = self._cache_key(endpoint, params)
+        if key not in self._cache:
+            self._cache[key] = await self._make_request_async("GET", endpoint, params=params)
+        return self._cache[key]
+
+    def invalidate_case(self, case_id: str) -> None:
+        """Drop cached reads for a case so the next read hits the API."""
+        prefix = f"/cases/{case_id}"
+        for key in list(self._cache.keys()):
+            endpoint = key[0]
+            if endpoint == prefix or endpoint.startswith(prefix + "/"):
+                self._cache.pop(key, None)
+
+    @staticmethod
+    def _unwrap_data(response: Any) -> Any:
+        """Return the 'data' member of a response if present."""
+        if isinstance(response, dict) and 'data' in response:
+            return response['data']
+        return response
+
+    @staticmethod
+    def _unwrap_items(response: Any, key: str) -> Dict[str, Any]:
+        """Return the list nested under response['data'][key] as {'items': [...]}."""
+        if isinstance(response, dict) and 'data' in response and key in response['data']:
+            return {'items': response['data'][key]}
+        return {'items': []}
 
     def list_cases(
         self,
@@ -58,57 +221,129 @@ class APIClient:
         sort_order: str = "desc"
     ) -> Dict[str, Any]:
         """Get a list of cases matching the specified criteria."""
-        params = []
-        
+        params: Dict[str, Any] = {
+            "limit": limit,
+            "sort": sort_by,
+            "order": sort_order
+        }
         if status:
-            params.append(f"status={','.join(status)}")
+            params["status"] = ",".join(status)
         if severity:
-            params.append(f"severity={','.join(severity)}")
+            params["severity"] = ",".join(severity)
         if min_score is not None:
-            params.append(f"min_score={min_score}")
+            params["min_score"] = min_score
         
-        params.extend([
-            f"limit={limit}",
-            f"sort={sort_by}",
-            f"order={sort_order}"
-        ])
-        
-        endpoint = f"/cases?{'&'.join(params)}"
-        response = self._make_request("GET", endpoint)
+        response = self._make_request("GET", "/cases", params=params)
         
         # Handle the nested response structure
-        if isinstance(response, dict) and 'data' in response and 'cases' in response['data']:
-            return {'items': response['data']['cases']}
-        return {'items': []}
+        return self._unwrap_items(response, 'cases')
 
     def get_case(self, case_id: str) -> Dict[str, Any]:
         """Get details for a specific case."""
-        response = self._make_request("GET", f"/cases/{case_id}")
-        if isinstance(response, dict) and 'data' in response:
-            return response['data']
-        return response
+        return self._unwrap_data(self._cached_get(f"/cases/{case_id}"))
 
     def get_case_summary(self, case_id: str) -> Dict[str, Any]:
         """Get the summary for a specific case."""
-        response = self._make_request("GET", f"/cases/{case_id}/summary")
-        if isinstance(response, dict) and 'data' in response:
-            return response['data']
-        return response
+        return self._unwrap_data(self._cached_get(f"/cases/{case_id}/summary"))
 
     def get_case_alerts(self, case_id: str, skip: int = 0, limit: int = 50) -> Dict[str, Any]:
         """Get alerts associated with a case."""
-        endpoint = f"/cases/{case_id}/alerts?skip={skip}&limit={limit}"
-        response = self._make_request("GET", endpoint)
-        if isinstance(response, dict) and 'data' in response and 'alerts' in response['data']:
-            return {'items': response['data']['alerts']}
-        return {'items': []}
+        params = {"skip": skip, "limit": limit}
+        return self._unwrap_items(
+            self._cached_get(f"/cases/{case_id}/alerts", params=params),
+            'alerts'
+        )
 
     def get_case_activities(self, case_id: str) -> Dict[str, Any]:
         """Get activities for a specific case."""
-        response = self._make_request("GET", f"/cases/{case_id}/activities")
-        if isinstance(response, dict) and 'data' in response and 'activities' in response['data']:
-            return {'items': response['data']['activities']}
-        return {'items': []}
+        return self._unwrap_items(self._make_request("GET", f"/cases/{case_id}/activities"), 'activities')
+
+    async def get_case_async(self, case_id: str) -> Dict[str, Any]:
+        """Get details for a specific case without blocking the event loop."""
+        return self._unwrap_data(await self._cached_get_async(f"/cases/{case_id}"))
+
+    async def get_case_summary_async(self, case_id: str) -> Dict[str, Any]:
+        """Get the summary for a specific case without blocking the event loop."""
+        return self._unwrap_data(await self._cached_get_async(f"/cases/{case_id}/summary"))
+
+    async def get_case_alerts_async(self, case_id: str, skip: int = 0, limit: int = 50) -> Dict[str, Any]:
+        """Get alerts associated with a case without blocking the event loop."""
+        params = {"skip": skip, "limit": limit}
+        return self._unwrap_items(
+            await self._cached_get_async(f"/cases/{case_id}/alerts", params=params),
+            'alerts'
+        )
+
+    async def get_case_activities_async(self, case_id: str) -> Dict[str, Any]:
+        """Get activities for a specific case without blocking the event loop."""
+        return self._unwrap_items(
+            await self._make_request_async("GET", f"/cases/{case_id}/activities"),
+            'activities'
+        )
+
+    async def iter_case_alerts(self, case_id: str, page_size: int = 50) -> AsyncIterator[Dict[str, Any]]:
+        """Iterate over all alerts of a case, prefetching the next page.
+        
+        The request for page N+1 is in flight while the caller consumes page N,
+        so network time overlaps with processing. Iteration stops at the first
+        page shorter than page_size.
+        
+        Args:
+            case_id: The case ID
+            page_size: Alerts per request (the API returns at most 50)
+            
+        Yields:
+            Dict[str, Any]: Alert data
+        """
+        skip = 0
+        next_page = asyncio.create_task(
+            self.get_case_alerts_async(case_id, skip=skip, limit=page_size)
+        )
+        try:
+            while next_page is not None:
+                alerts = (await next_page)['items']
+                skip += page_size
+                next_page = None
+                if len(alerts) >= page_size:
+                    next_page = asyncio.create_task(
+                        self.get_case_alerts_async(case_id, skip=skip, limit=page_size)
+                    )
+                for alert in alerts:
+                    yield alert
+        finally:
+            if next_page is not None:
+                next_page.cancel()
+
+    async def _collect_case_alerts(self, case_id: str) -> Dict[str, Any]:
+        """Fetch every page of a case's alerts."""
+        return {'items': [alert async for alert in self.iter_case_alerts(case_id)]}
+
+    async def hydrate_case(self, case_id: str) -> Case:
+        """Fetch a case with its summary, alerts and activities concurrently.
+        
+        The four requests are independent, so they are issued in parallel and
+        the total latency is that of the slowest one. All alert pages are
+        fetched.
+        
+        Args:
+            case_id: The case ID
+            
+        Returns:
+            Case: The case details with summary, alerts and activities attached
+        """
+        details, summary, alerts, activities = await asyncio.gather(
+            self.get_case_async(case_id),
+            self.get_case_summary_async(case_id),
+            self._collect_case_alerts(case_id),
+            self.get_case_activities_async(case_id)
+        )
+        return Case(
+            case_id=case_id,
+            details=details,
+            summary=summary,
+            alerts=alerts['items'],
+            activities=activities['items']
+        )
 
     def update_case(
         self,
@@ -129,7 +364,9 @@ class APIClient:
         if tags:
             data["tags"] = tags
 
-        return self._make_request("PUT", f"/cases/{case_id}", json=data)
+        response = self._make_request("PUT", f"/cases/{case_id}", json=data)
+        self.invalidate_case(case_id)
+        return response
 
     def add_case_comment(self, case_id: str, comment: str) -> Dict[str, Any]:
         """Add a comment to a case."""
@@ -144,17 +381,16 @@ class APIClient:
         limit: int = 50
     ) -> Dict[str, Any]:
         """Get alerts within a specific time range."""
-        params = [f"limit={limit}"]
+        params: Dict[str, Any] = {"limit": limit}
         
         if start_time:
-            params.append(f"start_time={start_time.isoformat()}")
+            params["start_time"] = start_time.isoformat()
         if end_time:
-            params.append(f"end_time={end_time.isoformat()}")
+            params["end_time"] = end_time.isoformat()
         if severity:
-            params.append(f"severity={','.join(severity)}")
+            params["severity"] = ",".join(severity)
             
-        endpoint = f"/alerts?{'&'.join(params)}"
-        return self._make_request("GET", endpoint)
+        return self._make_request("GET", "/alerts", params=params)
         
     def get_alert(self, alert_id: str) -> Dict[str, Any]:
         """Get details for a specific alert."""
@@ -175,5 +411,17 @@ class APIClient:
         """
         response = self._make_request('GET', '/tenants')
         # Log the raw response for debugging
-        logger.debug(f"Raw tenant response: {response}")
+        logger.debug("Raw tenant response: %s", response)
         return response
+
+@functools.lru_cache(maxsize=1)
+def get_api_client() -> APIClient:
+    """Get the process-wide API client.
+    
+    Agents share one client so they share its connection pool and token
+    state instead of each refreshing tokens against the same host.
+    
+    Returns:
+        APIClient: Shared API client
+    """
+    return APIClient(AuthManager())
@@ -1,23 +1,119 @@
-from typing import Dict, Any, List
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Sequence, Tuple, TypeVar, Union
 from datetime import datetime
+import asyncio
+import concurrent.futures
 from api_client import APIClient
 from supabase_client import SupabaseWrapper
-from ai_agent import AIAgent
+from ai_agent import AIAgent, CaseAnalysis
 from slack_notifier import SlackNotifier
 import logging
 
 logger = logging.getLogger(__name__)
 
+T = TypeVar('T')
+R = TypeVar('R')
+
+async def _bounded_gather(
+    func: Callable[[T], Awaitable[R]],
+    items: Sequence[T],
+    limit: int
+) -> List[Union[R, Exception]]:
+    """Run func over items with at most limit calls in flight.
+    
+    A fixed pool of workers pulls items as they free up, so only limit
+    coroutines exist at a time instead of one per item up front.
+    
+    Args:
+        func: Coroutine function applied to each item
+        items: Items to process
+        limit: Maximum number of concurrent calls
+        
+    Returns:
+        List[Union[R, Exception]]: One entry per item, in order; failed
+        calls are returned as their exception
+    """
+    results: List[Union[R, Exception]] = [None] * len(items)
+    pending = iter(enumerate(items))
+    
+    async def worker() -> None:
+        for index, item in pending:
+            try:
+                results[index] = await func(item)
+            except Exception as e:
+                results[index] = e
+    
+    async with asyncio.TaskGroup() as tg:
+        for _ in range(min(limit, len(items))):
+            tg.create_task(worker())
+    return results
+
 class CaseCollector:
+    # Maximum number of cases collected concurrently by the async path
+    MAX_CONCURRENT_CASES = 8
+    
+    # Background threads sending Slack notifications off the collection path
+    NOTIFY_WORKERS = 2
+    
     def __init__(self, api_client: APIClient, supabase_client: SupabaseWrapper, ai_agent: AIAgent):
         self.api_client = api_client
         self.supabase = supabase_client
         self.ai_agent = ai_agent
         self.slack_notifier = SlackNotifier()
-        
+        self._notify_pool = concurrent.futures.ThreadPoolExecutor(
+            max_workers=self.NOTIFY_WORKERS, thread_name_prefix="slack-notify"
+        )
+    
+    def close(self) -> None:
+        """Wait for pending Slack notifications to be sent."""
+        self._notify_pool.shutdown(wait=True, cancel_futures=False)
+        self.slack_notifier.close()
+    
     def collect_case_data(self, case_id: str) -> Dict[str, Any]:
         """Collect all data for a specific case and store in Supabase."""
-        logger.info(f"Collecting data for case {case_id}")
+        bundle, result = self._build_case_bundle(case_id)
+        
+        # Store the case, alerts, analysis and actions in one round trip
+        try:
+            self.supabase.store_case_bundle(
+                bundle['case'], bundle['alerts'], bundle['analysis'], bundle['actions']
+            )
+            logger.info("Successfully stored case %s in Supabase", case_id)
+        except Exception as e:
+            logger.error("Error storing case data in Supabase: %s", e)
+            raise
+        
+        self._notify_if_high_priority(bundle['case'], bundle['analysis'])
+        return result
+    
+    async def collect_case_data_async(self, case_id: str) -> Dict[str, Any]:
+        """Collect all data for a specific case and store in Supabase.
+        
+        The case details, summary, alerts and activities are fetched
+        concurrently, so collection costs one API round trip instead of four.
+        """
+        bundle, result = await self._build_case_bundle_async(case_id)
+        
+        try:
+            await asyncio.to_thread(
+                self.supabase.store_case_bundle,
+                bundle['case'], bundle['alerts'], bundle['analysis'], bundle['actions']
+            )
+            logger.info("Successfully stored case %s in Supabase", case_id)
+        except Exception as e:
+            logger.error("Error storing case data in Supabase: %s", e)
+            raise
+        
+        self._notify_if_high_priority(bundle['case'], bundle['analysis'])
+        return result
+    
+    def _build_case_bundle(self, case_id: str) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+        """Fetch and analyze a case, building the payload stored in Supabase.
+        
+        Returns:
+            Tuple of the Supabase bundle ('case', 'alerts', 'analysis' and
+            'actions') and the collected case data returned to callers
+        """
+        logger.info("Collecting data for case %s", case_id)
         
         # Get case details
         case_details = self.api_client.get_case(case_id)
@@ -33,7 +129,70 @@ class CaseCollector:
         activities_response = self.api_client.get_case_activities(case_id)
         activities = activities_response.get('items', [])
         
-        logger.info(f"Collected case data: {len(alerts)} alerts, {len(activities)} activities")
+        bundle, result = self._prepare_case_bundle(case_id, case_details, case_summary, alerts, activities)
+        
+        # Analyze case with AI
+        try:
+            analysis_data = self.ai_agent.analyze_case(self._analysis_input(bundle, result))
+            self._add_analysis(bundle, analysis_data)
+            logger.info("Successfully analyzed case %s", case_id)
+        except Exception as e:
+            logger.error("Error analyzing case %s: %s", case_id, e)
+        
+        return bundle, result
+    
+    async def _build_case_bundle_async(self, case_id: str) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+        """Fetch and analyze a case concurrently, building the Supabase payload.
+        
+        Returns:
+            Tuple of the Supabase bundle and the collected case data
+        """
+        bundle, result = await self._fetch_case_bundle_async(case_id)
+        
+        try:
+            analysis_data = await self.ai_agent.analyze_case(self._analysis_input(bundle, result))
+            self._add_analysis(bundle, analysis_data)
+            logger.info("Successfully analyzed case %s", case_id)
+        except Exception as e:
+            logger.error("Error analyzing case %s: %s", case_id, e)
+        
+        return bundle, result
+    
+    async def _fetch_case_bundle_async(self, case_id: str) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+        """Fetch a case concurrently and build its Supabase payload without analysis.
+        
+        Returns:
+            Tuple of the Supabase bundle and the collected case data
+        """
+        logger.info("Collecting data for case %s", case_id)
+        
+        case = await self.api_client.hydrate_case(case_id)
+        return self._prepare_case_bundle(
+            case_id, case.details, case.summary, case.alerts, case.activities
+        )
+    
+    @staticmethod
+    def _analysis_input(bundle: Dict[str, Any], result: Dict[str, Any]) -> Dict[str, Any]:
+        """Build the case data passed to the AI agent for analysis."""
+        return {
+            **bundle['case'],
+            'alerts': bundle['alerts'],
+            'activities': result['activities']
+        }
+    
+    def _prepare_case_bundle(
+        self,
+        case_id: str,
+        case_details: Dict[str, Any],
+        case_summary: Dict[str, Any],
+        alerts: List[Dict[str, Any]],
+        activities: List[Dict[str, Any]]
+    ) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+        """Build the Supabase bundle and caller result from fetched case data.
+        
+        The bundle's 'analysis' and 'actions' are left empty for _add_analysis.
+        """
+        logger.info("Collected case data: %d alerts, %d activities", len(alerts), len(activities))
         
         # Prepare case data for Supabase
         case_data = {
@@ -52,76 +211,20 @@ class CaseCollector:
             }
         }
         
-        # Store in Supabase
-        try:
-            # Check if case exists
-            existing_case = self.supabase.get_case_by_external_id(case_id)
-            if existing_case:
-                # Update existing case
-                case_result = self.supabase.update_case(existing_case['id'], case_data)
-                case_uuid = existing_case['id']
-                logger.info(f"Updated existing case {case_id} in Supabase")
-            else:
-                # Insert new case
-                case_result = self.supabase.insert_case(case_data)
-                case_uuid = case_result.data[0]['id']
-                logger.info(f"Inserted new case {case_id} in Supabase")
-            
-            # Insert alerts
-            if alerts:
-                alert_data = [{
-                    'external_id': alert.get('_id'),
-                    'title': alert.get('name'),
-                    'severity': alert.get('severity'),
-                    'details': alert
-                } for alert in alerts]
-                self.supabase.insert_alerts(alert_data, case_uuid)
-            
-            # Analyze case with AI
-            try:
-                analysis_data = self.ai_agent.analyze_case({
-                    **case_data,
-                    'alerts': alert_data if alerts else [],
-                    'activities': activities
-                })
-                
-                # Store analysis results
-                self.supabase.insert_analysis({
-                    'case_id': case_uuid,
-                    'severity_score': analysis_data['severity_score'],
-                    'priority_score': analysis_data['priority_score'],
-                    'key_indicators': analysis_data['key_indicators'],
-                    'patterns': analysis_data['patterns']
-                })
-                
-                # Store recommended actions
-                actions = [{
-                    'action_type': 'ai_recommended',
-                    'description': action,
-                    'priority': f"P{i+1}" if i < 3 else "P3",
-                    'status': 'pending'
-                } for i, action in enumerate(analysis_data['recommended_actions'])]
-                
-                if actions:
-                    self.supabase.insert_actions(actions, case_uuid)
-                
-                # Check if human attention is needed based on severity and priority scores
-                if (analysis_data.get('severity_score', 0) >= 7 or 
-                    analysis_data.get('priority_score', 0) >= 7):
-                    self.slack_notifier.notify_high_priority_case(case_data, analysis_data)
-                
-                logger.info(f"Successfully analyzed case {case_id}")
-                
-            except Exception as e:
-                logger.error(f"Error analyzing case {case_id}: {str(e)}")
-            
-            logger.info(f"Successfully stored case {case_id} in Supabase")
-            
-        except Exception as e:
-            logger.error(f"Error storing case data in Supabase: {str(e)}")
-            raise
+        alert_data = [{
+            'external_id': alert.get('_id'),
+            'title': alert.get('name'),
+            'severity': alert.get('severity'),
+            'details': alert
+        } for alert in alerts]
         
-        return {
+        bundle = {
+            'case': case_data,
+            'alerts': alert_data,
+            'analysis': None,
+            'actions': []
+        }
+        result = {
             'external_id': case_id,
             'title': case_details.get('name'),
             'severity': case_details.get('severity'),
@@ -130,6 +233,48 @@ class CaseCollector:
             'activities': activities,
             'summary': case_summary
         }
+        return bundle, result
+    
+    def _add_analysis(self, bundle: Dict[str, Any], analysis_data: Union[CaseAnalysis, Dict[str, Any]]) -> None:
+        """Attach AI analysis results and recommended actions to a case bundle."""
+        if isinstance(analysis_data, CaseAnalysis):
+            # Map the structured GPT analysis onto the stored analysis fields
+            analysis_data = {
+                'severity_score': analysis_data.risk_level,
+                'priority_score': analysis_data.risk_level,
+                'key_indicators': analysis_data.risk_factors,
+                'patterns': [],
+                'recommended_actions': analysis_data.manual_actions + analysis_data.automated_actions
+            }
+        
+        bundle['analysis'] = {
+            'severity_score': analysis_data['severity_score'],
+            'priority_score': analysis_data['priority_score'],
+            'key_indicators': analysis_data['key_indicators'],
+            'patterns': analysis_data['patterns'],
+            'recommended_actions': analysis_data['recommended_actions']
+        }
+        
+        # Recommended actions
+        bundle['actions'] = [{
+            'action_type': 'ai_recommended',
+            'description': action,
+            'priority': f"P{i+1}" if i < 3 else "P3",
+            'status': 'pending'
+        } for i, action in enumerate(analysis_data['recommended_actions'])]
+    
+    def _notify_if_high_priority(self, case_data: Dict[str, Any], analysis: Optional[Dict[str, Any]]) -> None:
+        """Notify Slack when the analysis says the case needs human attention.
+        
+        The notification is sent from a background thread so collection does
+        not wait on the mail relay; failures are logged by the notifier.
+        """
+        if not analysis:
+            return
+        # Check if human attention is needed based on severity and priority scores
+        if (analysis.get('severity_score', 0) >= 7 or
+            analysis.get('priority_score', 0) >= 7):
+            self._notify_pool.submit(self.slack_notifier.notify_high_priority_case, case_data, analysis)
     
     def collect_multiple_cases(
         self,
@@ -137,18 +282,100 @@ class CaseCollector:
         sort_by: str = 'created_at',
         sort_order: str = 'desc'
     ) -> List[Dict[str, Any]]:
-        """Collect data for multiple cases and store in Supabase."""
+        """Collect data for multiple cases and store in Supabase.
+        
+        All collected cases are stored with a single RPC call.
+        """
         cases = self.api_client.list_cases(limit=limit, sort_by=sort_by, sort_order=sort_order)
+        bundles = []
         results = []
         
         for case in cases.get('items', []):
             try:
                 case_id = case.get('_id')
                 if case_id:
-                    result = self.collect_case_data(case_id)
+                    bundle, result = self._build_case_bundle(case_id)
+                    bundles.append(bundle)
                     results.append(result)
             except Exception as e:
-                logger.error(f"Error collecting data for case {case_id}: {str(e)}")
+                logger.error("Error collecting data for case %s: %s", case_id, e)
+                continue
+        
+        return self._store_bundles(bundles, results)
+    
+    async def collect_multiple_cases_async(
+        self,
+        limit: int = 5,
+        sort_by: str = 'created_at',
+        sort_order: str = 'desc'
+    ) -> List[Dict[str, Any]]:
+        """Collect data for multiple cases concurrently and store in Supabase.
+        
+        At most MAX_CONCURRENT_CASES cases are fetched at once. The fetched
+        cases are then analyzed together in one concurrent AI batch, and all
+        collected cases are stored with a single RPC call.
+        """
+        cases = await asyncio.to_thread(
+            self.api_client.list_cases, limit=limit, sort_by=sort_by, sort_order=sort_order
+        )
+        case_ids = [case['_id'] for case in cases.get('items', []) if case.get('_id')]
+        collected = await _bounded_gather(
+            self._fetch_case_bundle_async, case_ids, self.MAX_CONCURRENT_CASES
+        )
+        
+        bundles = []
+        results = []
+        for case_id, outcome in zip(case_ids, collected):
+            if isinstance(outcome, Exception):
+                logger.error("Error collecting data for case %s: %s", case_id, outcome)
                 continue
-                
+            bundle, result = outcome
+            bundles.append(bundle)
+            results.append(result)
+        
+        analyses = await self.ai_agent.analyze_cases([
+            self._analysis_input(bundle, result) for bundle, result in zip(bundles, results)
+        ])
+        for bundle, analysis in zip(bundles, analyses):
+            case_id = bundle['case']['external_id']
+            if isinstance(analysis, Exception):
+                logger.error("Error analyzing case %s: %s", case_id, analysis)
+                continue
+            self._add_analysis(bundle, analysis)
+        
+        return await asyncio.to_thread(self._store_bundles, bundles, results)
+    
+    def _store_bundles(
+        self,
+        bundles: List[Dict[str, Any]],
+        results: List[Dict[str, Any]]
+    ) -> List[Dict[str, Any]]:
+        """Store collected case bundles and send notifications.
+        
+        The bundles are stored in one RPC call. If that fails, each bundle is
+        stored on its own so one bad case does not lose the others; cases
+        that still fail are logged and left out of the results.
+        """
+        try:
+            self.supabase.store_case_bundles(bundles)
+            logger.info("Successfully stored %d cases in Supabase", len(bundles))
+        except Exception as e:
+            logger.error("Error storing case batch in Supabase, storing cases one by one: %s", e)
+            stored_bundles = []
+            stored_results = []
+            for bundle, result in zip(bundles, results):
+                try:
+                    self.supabase.store_case_bundle(
+                        bundle['case'], bundle['alerts'], bundle['analysis'], bundle['actions']
+                    )
+                except Exception as case_error:
+                    logger.error("Error storing case %s in Supabase: %s", bundle['case']['external_id'], case_error)
+                    continue
+                stored_bundles.append(bundle)
+                stored_results.append(result)
+            bundles, results = stored_bundles, stored_results
+        
+        for bundle in bundles:
+            self._notify_if_high_priority(bundle['case'], bundle['analysis'])
+        
         return results
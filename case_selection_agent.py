@@ -1,20 +1,52 @@
+import time
 from typing import Optional, Dict, Any
-from api_client import APIClient
+import numpy as np
+from api_client import APIClient, get_api_client
 from config import settings
 import logging
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+SEVERITY_WEIGHTS = {
+    "Critical": 4,
+    "High": 3,
+    "Medium": 2,
+    "Low": 1
+}
+
+# Severity dominates the composite priority; scores stay well below this
+SEVERITY_SCALE = 1e6
+
+def case_priority(
+    case: Dict[str, Any],
+    _severity_weight=SEVERITY_WEIGHTS.get,
+    _scale: float = SEVERITY_SCALE
+) -> float:
+    """Priority of a case as one number: severity weight, then score.
+    
+    The weight lookup and scale are bound as defaults so each call reads
+    locals instead of module globals.
+    """
+    return _severity_weight(case.get("severity", "Low"), 0) * _scale + case.get("score", 0)
+
 class CaseSelectionAgent:
-    def __init__(self):
-        self.api_client = APIClient()
+    # An empty queue is remembered this long so idle polls skip the API call
+    EMPTY_QUEUE_TTL_SECONDS = 30
+    
+    def __init__(self, api_client: Optional[APIClient] = None):
+        self.api_client = api_client or get_api_client()
+        self._empty_until = 0.0
         
     def select_next_case(self) -> Optional[Dict[str, Any]]:
         """
         Select the highest priority case that needs investigation.
         Returns the case data or None if no suitable cases are found.
         """
+        if time.monotonic() < self._empty_until:
+            logger.debug("Case queue was empty recently, skipping lookup")
+            return None
+        
         try:
             # Get cases matching our criteria
             response = self.api_client.list_cases(
@@ -27,23 +59,13 @@ class CaseSelectionAgent:
             cases = response.get("data", {}).get("cases", [])
             if not cases:
                 logger.info("No cases found matching selection criteria")
+                self._empty_until = time.monotonic() + self.EMPTY_QUEUE_TTL_SECONDS
                 return None
+            self._empty_until = 0.0
             
-            # Sort cases by priority (score and severity)
-            def case_priority(case):
-                severity_weights = {
-                    "Critical": 4,
-                    "High": 3,
-                    "Medium": 2,
-                    "Low": 1
-                }
-                return (
-                    severity_weights.get(case.get("severity", "Low"), 0),
-                    case.get("score", 0)
-                )
-            
-            sorted_cases = sorted(cases, key=case_priority, reverse=True)
-            selected_case = sorted_cases[0]
+            # Pick the highest priority case (severity, then score)
+            priorities = np.fromiter((case_priority(case) for case in cases), dtype=np.float64, count=len(cases))
+            selected_case = cases[int(priorities.argmax())]
             
             logger.info(
                 f"Selected case {selected_case.get('ticket_id')} "
@@ -4,33 +4,50 @@ from typing import Optional, NoReturn
 from case_selection_agent import CaseSelectionAgent
 from investigation_agent import InvestigationAgent
 from notification_agent import NotificationAgent
+from api_client import get_api_client
 from config import settings
 import signal
 import sys
 from datetime import datetime
 import asyncio
+from src.utils.event_loop import install_uvloop
 
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-)
 logger = logging.getLogger(__name__)
 
 class CoordinationAgent:
     def __init__(self):
-        self.case_selector = CaseSelectionAgent()
-        self.investigator = InvestigationAgent()
-        self.notifier = NotificationAgent()
-        self.running = True
-        
-        # Set up signal handlers
-        signal.signal(signal.SIGINT, self._handle_shutdown)
-        signal.signal(signal.SIGTERM, self._handle_shutdown)
+        api_client = get_api_client()
+        self.case_selector = CaseSelectionAgent(api_client)
+        self.investigator = InvestigationAgent(api_client)
+        self.notifier = NotificationAgent(api_client)
+        self._stop = asyncio.Event()
+
+    @property
+    def running(self) -> bool:
+        """Whether the agent has not been asked to stop."""
+        return not self._stop.is_set()
+
+    def _install_signal_handlers(self) -> None:
+        """Stop the main loop on SIGINT/SIGTERM."""
+        loop = asyncio.get_running_loop()
+        for signum in (signal.SIGINT, signal.SIGTERM):
+            try:
+                loop.add_signal_handler(signum, self._request_stop)
+            except NotImplementedError:
+                # Event loops on Windows do not support add_signal_handler
+                signal.signal(signum, lambda *_: loop.call_soon_threadsafe(self._request_stop))
 
-    def _handle_shutdown(self, signum: int, frame) -> None:
+    def _request_stop(self) -> None:
         """Handle shutdown signals gracefully."""
         logger.info("Shutdown signal received, stopping gracefully...")
-        self.running = False
+        self._stop.set()
+
+    async def _sleep(self, seconds: float) -> None:
+        """Sleep for the given time, returning early if a stop is requested."""
+        try:
+            await asyncio.wait_for(self._stop.wait(), timeout=seconds)
+        except asyncio.TimeoutError:
+            pass
 
     async def run_forever(self) -> NoReturn:
         """
@@ -38,28 +55,26 @@ class CoordinationAgent:
         Runs until shutdown signal is received.
         """
         logger.info("Starting Coordination Agent...")
+        self._install_signal_handlers()
         
         while self.running:
             try:
                 await self._process_next_case()
                 
                 # Sleep between iterations
-                logger.info(f"Sleeping for {settings.POLLING_INTERVAL_SECONDS} seconds...")
-                for _ in range(settings.POLLING_INTERVAL_SECONDS):
-                    if not self.running:
-                        break
-                    await asyncio.sleep(1)
+                logger.info("Sleeping for %s seconds...", settings.POLLING_INTERVAL_SECONDS)
+                await self._sleep(settings.POLLING_INTERVAL_SECONDS)
                     
             except Exception as e:
-                logger.error(f"Error in main loop: {str(e)}")
-                await asyncio.sleep(settings.RETRY_DELAY_SECONDS)
+                logger.error("Error in main loop: %s", e)
+                await self._sleep(settings.RETRY_DELAY_SECONDS)
 
         logger.info("Coordination Agent stopped.")
 
     async def _process_next_case(self) -> None:
         """Process the next available case that needs investigation."""
-        # Select next case
-        case = self.case_selector.select_next_case()
+        # Select next case; the lookup uses the blocking API client, so run it in a worker thread
+        case = await asyncio.to_thread(self.case_selector.select_next_case)
         if not case:
             logger.info("No cases to process at this time")
             return
@@ -67,26 +82,31 @@ class CoordinationAgent:
         try:
             case_id = case.get("_id")
             ticket_id = case.get("ticket_id")
-            logger.info(f"Processing case {ticket_id} ({case_id})")
+            logger.info("Processing case %s (%s)", ticket_id, case_id)
 
             # Investigate the case
             investigation_results = await self.investigator.investigate_case(case_id)
 
             # Check if human intervention is needed
             if investigation_results["needs_human"]:
-                logger.info(f"Case {ticket_id} requires human attention, sending notification")
-                notification_success = self.notifier.notify_case_escalation(investigation_results)
+                logger.info("Case %s requires human attention, sending notification", ticket_id)
+                notification_success = await self.notifier.notify_case_escalation(investigation_results)
                 
                 if notification_success:
-                    logger.info(f"Successfully escalated case {ticket_id}")
+                    logger.info("Successfully escalated case %s", ticket_id)
                 else:
-                    logger.error(f"Failed to send notification for case {ticket_id}")
+                    logger.error("Failed to send notification for case %s", ticket_id)
             else:
-                logger.info(f"Case {ticket_id} does not require human intervention")
+                logger.info("Case %s does not require human intervention", ticket_id)
 
         except Exception as e:
-            logger.error(f"Error processing case {case.get('ticket_id', 'unknown')}: {str(e)}")
+            logger.error("Error processing case %s: %s", case.get('ticket_id', 'unknown'), e)
 
 if __name__ == "__main__":
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+    )
+    install_uvloop()
     coordinator = CoordinationAgent()
     asyncio.run(coordinator.run_forever())
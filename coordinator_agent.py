@@ -1,25 +1,68 @@
 import os
 import uuid
+import hashlib
+import heapq
+import inspect
+import random
 import logging
 import asyncio
+import time
+from dataclasses import dataclass
+from functools import cached_property
 from datetime import datetime
-from typing import Dict, Any, List, Optional, Callable, Union, TypedDict, NoReturn
+from enum import IntEnum
+from typing import Dict, Any, List, Optional, Set, Tuple, Callable, Awaitable, Union, TypedDict, NoReturn
+import numpy as np
+from cachetools import TTLCache
+import orjson
 from supabase_client import SupabaseWrapper
 from api_client import APIClient
 from ai_agent import AIAgent, CaseAnalysis
 from slack_notifier import SlackNotifier
+from src.utils.event_loop import install_uvloop, monitor_loop_lag
 from pydantic import BaseModel, Field
 
 logger = logging.getLogger(__name__)
 
-class WorkflowStage(TypedDict):
-    start_time: datetime
-    status: str
+def _env_int(name: str, default: int, minimum: int = 1) -> int:
+    """Read a positive integer setting from the environment, falling back to default."""
+    try:
+        return max(minimum, int(os.getenv(name, str(default))))
+    except ValueError as e:
+        logger.error(f"Error parsing {name}: {e}")
+        return default
+
+def _log_task_exception(task: asyncio.Task) -> None:
+    """Done callback that logs a background task ending with an error."""
+    if not task.cancelled() and task.exception() is not None:
+        logger.error(f"Background task {task.get_name()} failed: {task.exception()}")
+
+@dataclass(slots=True)
+class WorkflowStage:
+    """A running stage execution tracked for stale detection."""
+    name: str
+    start_monotonic: float  # time.monotonic() when the stage started, for deadline math
+    started_at: datetime  # Wall-clock start time, only for human-readable messages
+    status: str = 'running'
+
+class Stage(IntEnum):
+    """Workflow stages, used to index the per-stage state lists."""
+    ALERT_INGESTION = 0
+    TRIAGE = 1
+    INVESTIGATION = 2
+    CONTAINMENT = 3
+    REVIEW = 4
+    SOC_OPTIMIZATION = 5
+
+# Stage names as used in configs, handlers and stored metrics
+STAGE_NAMES = tuple(stage.name.lower() for stage in Stage)
+STAGE_INDEX = {name: stage for name, stage in zip(STAGE_NAMES, Stage)}
 
 class AgentMetrics(TypedDict):
     success: int
     failure: int
     avg_time: float
+    m2: float  # Sum of squared deviations from avg_time (Welford)
 
 class StageConfig(BaseModel):
     """Configuration for a workflow stage."""
@@ -27,16 +70,65 @@ class StageConfig(BaseModel):
     timeout: float = Field(default=300.0, gt=0.0)  # timeout in seconds
     max_retries: int = Field(default=3, ge=0)
     backoff_factor: float = Field(default=1.5, gt=1.0)
+    max_delay: float = Field(default=60.0, gt=0.0)  # cap on a single retry delay in seconds
+    jitter_factor: float = Field(default=1.0, ge=0.0, le=1.0)  # 1.0 is full jitter
 
 class CoordinatorAgent:
     """Agent responsible for coordinating the case investigation workflow."""
 
+    # Stages every case goes through, in order
+    CASE_STAGES = ('alert_ingestion', 'triage', 'investigation', 'containment', 'review')
+
+    # Metric updates arriving within this window are written to Supabase together
+    METRICS_FLUSH_INTERVAL = 0.2
+
+    # Row updates queued within this window are written together, per table
+    DB_WRITE_FLUSH_INTERVAL = 0.05
+    DB_WRITE_BATCH_SIZE = 128
+    # Unique column matching existing rows of each table written through the queue
+    DB_WRITE_KEYS = {'cases': 'external_id'}
+
+    # Performance is analyzed when a failure or slow stage is recorded, at most
+    # once per MIN_INTERVAL and at least once per MAX_INTERVAL
+    METRICS_ANALYSIS_MIN_INTERVAL = 60
+    METRICS_ANALYSIS_MAX_INTERVAL = 300
+
+    # Running stages older than this are treated as stale
+    STAGE_STALE_SECONDS = 3600
+
+    # Slack notifications queued within this window are sent as one message per category
+    SLACK_COALESCE_WINDOW = 0.5
+
+    # Optimization recommendations are reused for stages in the same condition
+    RECOMMENDATION_CACHE_SIZE = 64
+    RECOMMENDATION_CACHE_TTL = 600
+    RECOMMENDATION_MAX_FAILURES = 10
+
+    # Stage configuration changes applied by each optimization focus
+    OPTIMIZATION_DELTAS: Dict[str, Dict[str, float]] = {
+        'reliability': {'max_retries_delta': 1, 'backoff_mul': 1.2},
+        'performance': {'timeout_mul': 0.8}
+    }
+    # A stage is optimized for a focus at most once per cooldown, and the
+    # repeated deltas are clamped so the configuration stays usable
+    STAGE_OPTIMIZATION_COOLDOWN = 300
+    MIN_STAGE_TIMEOUT = 30.0
+    MAX_STAGE_RETRIES = 10
+    MAX_BACKOFF_FACTOR = 4.0
+
+    # Cases waiting for a worker; producers wait once the queue is full
+    DEFAULT_CASE_QUEUE_MAX = 256
+
+    # Workers draining the case queue; stages are I/O bound, so cases overlap
+    DEFAULT_CASE_WORKER_CONCURRENCY = 4
+
     def __init__(self, api_client: APIClient, supabase_client: SupabaseWrapper, ai_agent: AIAgent):
         """Initialize the CoordinatorAgent with required components and configuration.
         
         Args:
             api_client: Client for making API calls
-            supabase_client: Client for database operations
+            supabase_client: Client for database operations, normally the shared
+                one from get_supabase_client()
             ai_agent: AI agent for analysis and recommendations
             
         Raises:
@@ -56,6 +148,11 @@ class CoordinatorAgent:
         
         # Initialize workflow stages tracking
         self.workflow_stages: Dict[str, WorkflowStage] = {}
+        # Stale stage deadlines as a min-heap of (deadline, stage ID); entries of
+        # finished stages are skipped lazily. One timer fires at the earliest deadline.
+        self._stage_deadlines: List[Tuple[float, str]] = []
+        self._stale_timer: Optional[asyncio.TimerHandle] = None
+        self._timeout_tasks: Set[asyncio.Task] = set()
         
         # Initialize stage configurations
         self.stage_configs: Dict[str, StageConfig] = {
@@ -67,16 +164,31 @@ class CoordinatorAgent:
             'soc_optimization': StageConfig(name='soc_optimization', timeout=300.0)
         }
         
-        # Initialize performance metrics
-        self.metrics: Dict[str, AgentMetrics] = {
-            stage: {'success': 0, 'failure': 0, 'avg_time': 0}
-            for stage in self.stage_configs.keys()
-        }
+        # Per-stage performance metrics and agent status, kept in parallel
+        # arrays indexed by Stage so analysis runs as one vector pass; see the
+        # metrics and agent_status properties
+        stage_count = len(Stage)
+        self._success = np.zeros(stage_count, dtype=np.int64)
+        self._failure = np.zeros(stage_count, dtype=np.int64)
+        self._avg_time = np.zeros(stage_count, dtype=np.float64)
+        self._m2 = np.zeros(stage_count, dtype=np.float64)  # Sum of squared deviations (Welford)
+        self._status: List[str] = ['ready'] * stage_count
         
-        # Initialize agent status tracking
-        self.agent_status: Dict[str, str] = {
-            stage: 'ready' for stage in self.stage_configs.keys()
-        }
+        # Bumped on every metrics or status change so derived views can be cached
+        self._metrics_version = 0
+        self._perf_cache_version = -1
+        self._perf_cache: Dict[str, Dict[str, Any]] = {}
+        self._analyzed_version = 0
+        self._recommendation_cache: TTLCache = TTLCache(
+            maxsize=self.RECOMMENDATION_CACHE_SIZE,
+            ttl=self.RECOMMENDATION_CACHE_TTL
+        )
+        # Digest of the last recommendations announced per (stage, focus)
+        self._last_recommendation_digest: Dict[Tuple[str, str], bytes] = {}
+        # time.monotonic() of the last optimization applied per (stage, focus)
+        self._last_optimized: Dict[Tuple[str, str], float] = {}
+        # Recommendation requests running in the background for audit
+        self._recommendation_tasks: Set[asyncio.Task] = set()
         
         # Load and validate optimization thresholds
         try:
@@ -94,24 +206,72 @@ class CoordinatorAgent:
                 'error_threshold': 3
             }
         
-        # Error tracking
-        self.error_counts = {stage: 0 for stage in self.stage_configs.keys()}
+        # Thresholds never change after startup, so hot paths read plain attributes
+        self.execution_time_threshold: float = self.thresholds['execution_time']
+        self.success_rate_threshold: float = self.thresholds['success_rate']
+        self.error_threshold: int = self.thresholds['error_threshold']
+        
+        case_queue_max = _env_int('CASE_QUEUE_MAX', self.DEFAULT_CASE_QUEUE_MAX)
+        self.worker_concurrency = _env_int('CASE_WORKER_CONCURRENCY', self.DEFAULT_CASE_WORKER_CONCURRENCY)
+        
+        # Error tracking, indexed by Stage
+        self.error_counts: List[int] = [0] * stage_count
         
         # Async primitives
         self._shutdown_event = asyncio.Event()
-        self._case_queue: asyncio.Queue[Dict[str, Any]] = asyncio.Queue()
+        self._metrics_event = asyncio.Event()  # Set when metrics need analysis
+        self._case_queue: asyncio.Queue[Dict[str, Any]] = asyncio.Queue(maxsize=case_queue_max)
+        self._metrics_queue: asyncio.Queue[tuple[Stage, AgentMetrics]] = asyncio.Queue()
+        self._slack_queue: asyncio.Queue[tuple[str, str]] = asyncio.Queue()
+        self._db_write_queue: asyncio.Queue[tuple[str, Dict[str, Any]]] = asyncio.Queue()
         self._tasks: List[asyncio.Task] = []
 
+    @property
+    def metrics(self) -> Dict[str, AgentMetrics]:
+        """Snapshot of the performance metrics of every stage, keyed by stage name."""
+        return {name: self._stage_metrics(stage) for name, stage in STAGE_INDEX.items()}
+
+    @property
+    def agent_status(self) -> Dict[str, str]:
+        """Snapshot of the status of every stage agent, keyed by stage name."""
+        return dict(zip(STAGE_NAMES, self._status))
+
+    def _stage_metrics(self, stage: Stage) -> AgentMetrics:
+        """Get the performance metrics of one stage."""
+        return {
+            'success': int(self._success[stage]),
+            'failure': int(self._failure[stage]),
+            'avg_time': float(self._avg_time[stage]),
+            'm2': float(self._m2[stage])
+        }
+
+    @classmethod
+    def configure_event_loop(cls) -> bool:
+        """Use uvloop for the coordinator's event loop when available.
+        
+        Must be called before the event loop is created, i.e. before
+        asyncio.run().
+        
+        Returns:
+            bool: True if uvloop was installed
+        """
+        return install_uvloop()
+
     async def start(self) -> None:
         """Start the coordinator agent and its worker tasks."""
         logger.info("Starting Coordinator Agent...")
         
         # Create worker tasks
         self._tasks = [
-            asyncio.create_task(self._process_cases()),
+            *(asyncio.create_task(self._process_cases()) for _ in range(self.worker_concurrency)),
             asyncio.create_task(self._monitor_metrics()),
-            asyncio.create_task(self._cleanup_stale_stages())
+            asyncio.create_task(self._flush_metrics_loop()),
+            asyncio.create_task(self._slack_loop()),
+            asyncio.create_task(self._db_flush_loop()),
+            asyncio.create_task(monitor_loop_lag())
         ]
+        for task in self._tasks:
+            task.add_done_callback(_log_task_exception)
         
         try:
             # Wait for shutdown signal
@@ -123,26 +283,85 @@ class CoordinatorAgent:
         """Gracefully shut down the coordinator agent."""
         logger.info("Shutting down Coordinator Agent...")
         
-        # Cancel all tasks
+        # Cancel all tasks and the pending stale stage timer
         for task in self._tasks:
             task.cancel()
+        if self._stale_timer:
+            self._stale_timer.cancel()
+            self._stale_timer = None
+        self._stage_deadlines.clear()
+        for task in self._recommendation_tasks:
+            task.cancel()
         
         # Wait for tasks to complete
         await asyncio.gather(*self._tasks, return_exceptions=True)
         
+        # Write out metric updates, row writes and notifications still waiting for their workers
+        results = await asyncio.gather(
+            self._flush_metrics(self._drain_metrics_queue()),
+            self._flush_db_writes(self._drain_db_write_queue()),
+            self._send_notifications(self._drain_slack_queue()),
+            return_exceptions=True
+        )
+        for action, result in zip(('flush metrics', 'write rows', 'send notifications'), results):
+            if isinstance(result, Exception):
+                logger.error(f"Failed to {action} on shutdown: {str(result)}")
+        
         # Close clients
-        await self.api_client.close()
-        await self.supabase.close()
+        results = await asyncio.gather(
+            self._close_client(self.api_client),
+            self._close_client(self.supabase),
+            self._close_client(self.slack_notifier),
+            return_exceptions=True
+        )
+        for client, result in zip(('API', 'Supabase', 'Slack'), results):
+            if isinstance(result, Exception):
+                logger.error(f"Error closing {client} client: {str(result)}")
         
         logger.info("Coordinator Agent shutdown complete")
 
+    @staticmethod
+    async def _close_client(client: Any) -> None:
+        """Close a client through whichever close methods it has.
+        
+        aclose() is awaited, a coroutine close() is awaited and a blocking
+        close() runs in a worker thread; clients without either are skipped.
+        
+        Args:
+            client: Client to close
+        """
+        aclose = getattr(client, 'aclose', None)
+        if aclose is not None:
+            await aclose()
+        close = getattr(client, 'close', None)
+        if close is None:
+            return
+        if inspect.iscoroutinefunction(close):
+            await close()
+        else:
+            await asyncio.to_thread(close)
+
+    async def submit_case(self, case: Dict[str, Any]) -> None:
+        """Queue a case for processing, waiting while the queue is full.
+        
+        Args:
+            case: Case data to process
+        """
+        await self._case_queue.put(case)
+
     async def _process_cases(self) -> None:
-        """Process cases from the queue."""
+        """Process cases from the queue.
+        
+        Several of these workers drain the same queue; each case is marked
+        done even when it fails, so join() on the queue still completes.
+        """
         while True:
             try:
                 case = await self._case_queue.get()
-                await self._process_single_case(case)
-                self._case_queue.task_done()
+                try:
+                    await self._process_single_case(case)
+                finally:
+                    self._case_queue.task_done()
             except asyncio.CancelledError:
                 break
             except Exception as e:
@@ -163,8 +382,7 @@ class CoordinatorAgent:
         
         try:
             # Execute stages in sequence
-            stages = ['alert_ingestion', 'triage', 'investigation', 'containment', 'review']
-            for stage in stages:
+            for stage in self.CASE_STAGES:
                 config = self.stage_configs[stage]
                 
                 # Execute stage with timeout and retries
@@ -177,12 +395,12 @@ class CoordinatorAgent:
                         logger.warning(f"Stage {stage} timed out for case {case_id}")
                         if attempt == config.max_retries:
                             raise
-                        await asyncio.sleep(config.backoff_factor ** attempt)
+                        await asyncio.sleep(self._retry_delay(config, attempt))
                     except Exception as e:
                         logger.error(f"Stage {stage} failed for case {case_id}: {str(e)}")
                         if attempt == config.max_retries:
                             raise
-                        await asyncio.sleep(config.backoff_factor ** attempt)
+                        await asyncio.sleep(self._retry_delay(config, attempt))
             
             logger.info(f"Successfully processed case {case_id}")
             
@@ -191,64 +409,350 @@ class CoordinatorAgent:
             await self._handle_case_failure(case, str(e))
             raise RuntimeError(f"Case processing failed: {str(e)}") from e
 
-    def _get_stage_handler(self, stage: str) -> Callable:
-        """Get the handler function for a stage.
+    async def _execute_stage(self, stage_name: str, handler: Callable[..., Awaitable[Any]], *args: Any) -> Any:
+        """Run a stage handler and record the outcome in the stage metrics.
         
         Args:
-            stage: Stage name
+            stage_name: Stage being executed
+            handler: Coroutine function implementing the stage
+            *args: Arguments passed to the handler
             
         Returns:
-            Callable: Stage handler function
+            Any: Result of the handler
             
         Raises:
-            ValueError: If stage is invalid
+            ValueError: If the stage is invalid
+            Exception: Any error raised by the handler, after it is recorded
+        """
+        stage = STAGE_INDEX.get(stage_name)
+        if stage is None:
+            raise ValueError(f"Invalid stage: {stage_name}")
+        
+        stage_id = str(uuid.uuid4())
+        start = time.monotonic()
+        self._track_stage(stage_id, stage_name, start)
+        self._set_agent_status(stage, 'running')
+        try:
+            result = await handler(*args)
+        except Exception:
+            self._set_agent_status(stage, 'error')
+            self._update_metrics(stage, False, time.monotonic() - start)
+            raise
+        finally:
+            self._untrack_stage(stage_id)
+        
+        self._set_agent_status(stage, 'ready')
+        self._update_metrics(stage, True, time.monotonic() - start)
+        return result
+
+    def _set_agent_status(self, stage: Stage, status: str) -> None:
+        """Set the status of a stage agent."""
+        self._status[stage] = status
+        self._metrics_version += 1
+
+    def _track_stage(self, stage_id: str, stage_name: str, start_time: float) -> None:
+        """Register a running stage and add its stale deadline to the heap.
+        
+        Args:
+            stage_id: Unique ID of this stage execution
+            stage_name: Name of the stage being executed
+            start_time: time.monotonic() when the stage started
+        """
+        self.workflow_stages[stage_id] = WorkflowStage(stage_name, start_time, datetime.now())
+        heapq.heappush(self._stage_deadlines, (start_time + self.STAGE_STALE_SECONDS, stage_id))
+        if self._stage_deadlines[0][1] == stage_id:
+            self._arm_stale_timer()
+
+    def _untrack_stage(self, stage_id: str) -> None:
+        """Forget a finished stage; its heap entry is skipped when it comes due."""
+        self.workflow_stages.pop(stage_id, None)
+        # Rebuild the heap once entries of finished stages dominate it
+        if len(self._stage_deadlines) > 2 * len(self.workflow_stages) + 64:
+            self._stage_deadlines = [
+                entry for entry in self._stage_deadlines if entry[1] in self.workflow_stages
+            ]
+            heapq.heapify(self._stage_deadlines)
+
+    def _arm_stale_timer(self) -> None:
+        """Schedule the stale check for the earliest stage deadline."""
+        if self._stale_timer:
+            self._stale_timer.cancel()
+            self._stale_timer = None
+        if self._stage_deadlines:
+            delay = max(0.0, self._stage_deadlines[0][0] - time.monotonic())
+            self._stale_timer = asyncio.get_running_loop().call_later(delay, self._on_stages_stale)
+
+    def _update_metrics(self, stage: Stage, success: bool, execution_time: float) -> None:
+        """Update the in-memory metrics for a stage and queue them for storage.
+        
+        The Supabase write happens in _flush_metrics_loop, so stage execution
+        never waits on a database round trip.
+        
+        Args:
+            stage: Stage that finished executing
+            success: Whether the stage succeeded
+            execution_time: Stage execution time in seconds
+        """
+        if success:
+            self._success[stage] += 1
+        else:
+            self._failure[stage] += 1
+        
+        # Welford's update keeps the mean and variance stable over long runs
+        total_executions = int(self._success[stage] + self._failure[stage])
+        avg_time = float(self._avg_time[stage])
+        delta = execution_time - avg_time
+        avg_time += delta / total_executions
+        self._avg_time[stage] = avg_time
+        self._m2[stage] += delta * (execution_time - avg_time)
+        self._metrics_version += 1
+        if not success or execution_time > self.execution_time_threshold:
+            self._metrics_event.set()
+        
+        self._metrics_queue.put_nowait((stage, self._stage_metrics(stage)))
+
+    async def _flush_metrics_loop(self) -> None:
+        """Write queued stage metrics to Supabase in batches.
+        
+        Updates arriving within METRICS_FLUSH_INTERVAL of each other are
+        coalesced, so each stage is written at most once per window.
+        """
+        while True:
+            try:
+                stage, snapshot = await self._metrics_queue.get()
+                await asyncio.sleep(self.METRICS_FLUSH_INTERVAL)
+                pending = self._drain_metrics_queue()
+                pending.setdefault(stage, snapshot)
+                await self._flush_metrics(pending)
+            except asyncio.CancelledError:
+                break
+            except Exception as e:
+                logger.error(f"Error flushing metrics: {str(e)}")
+
+    def _drain_metrics_queue(self) -> Dict[Stage, AgentMetrics]:
+        """Take all queued metric snapshots, keeping the latest per stage."""
+        pending: Dict[Stage, AgentMetrics] = {}
+        while True:
+            try:
+                stage, snapshot = self._metrics_queue.get_nowait()
+            except asyncio.QueueEmpty:
+                return pending
+            pending[stage] = snapshot
+
+    async def _flush_metrics(self, pending: Dict[Stage, AgentMetrics]) -> None:
+        """Store the latest metrics for each stage with one upsert per stage.
+        
+        Args:
+            pending: Latest metrics snapshot per stage
+        """
+        if not pending:
+            return
+        
+        last_updated = datetime.now().isoformat()
+        results = await asyncio.gather(*(
+            self.supabase.update_agent_metrics(STAGE_NAMES[stage], {**snapshot, 'last_updated': last_updated})
+            for stage, snapshot in pending.items()
+        ), return_exceptions=True)
+        
+        for stage, result in zip(pending, results):
+            if isinstance(result, Exception):
+                logger.error(f"Error storing metrics for stage {STAGE_NAMES[stage]}: {str(result)}")
+
+    async def _db_flush_loop(self) -> None:
+        """Write queued row updates to Supabase in batches.
+        
+        Updates arriving within DB_WRITE_FLUSH_INTERVAL of each other are sent
+        together per table, up to DB_WRITE_BATCH_SIZE rows at a time.
+        """
+        while True:
+            try:
+                table, row = await self._db_write_queue.get()
+                await asyncio.sleep(self.DB_WRITE_FLUSH_INTERVAL)
+                pending = self._drain_db_write_queue(self.DB_WRITE_BATCH_SIZE - 1)
+                pending.setdefault(table, {}).setdefault(row[self.DB_WRITE_KEYS[table]], row)
+                await self._flush_db_writes(pending)
+            except asyncio.CancelledError:
+                break
+            except Exception as e:
+                logger.error(f"Error writing rows: {str(e)}")
+
+    def _drain_db_write_queue(self, limit: Optional[int] = None) -> Dict[str, Dict[Any, Dict[str, Any]]]:
+        """Take queued row writes, keeping the latest row per table and key.
+        
+        Earlier writes to a row are dropped in favor of the latest one.
+        
+        Args:
+            limit: Maximum number of writes to take; all queued writes if None
+        """
+        pending: Dict[str, Dict[Any, Dict[str, Any]]] = {}
+        taken = 0
+        while limit is None or taken < limit:
+            try:
+                table, row = self._db_write_queue.get_nowait()
+            except asyncio.QueueEmpty:
+                break
+            pending.setdefault(table, {})[row[self.DB_WRITE_KEYS[table]]] = row
+            taken += 1
+        return pending
+
+    async def _flush_db_writes(self, pending: Dict[str, Dict[Any, Dict[str, Any]]]) -> None:
+        """Update pending rows, grouped by table.
+        
+        Args:
+            pending: Latest row per key, grouped by table
+        """
+        if not pending:
+            return
+        
+        results = await asyncio.gather(*(
+            self.supabase.update_rows(table, list(rows.values()), self.DB_WRITE_KEYS[table])
+            for table, rows in pending.items()
+        ), return_exceptions=True)
+        
+        for (table, rows), result in zip(pending.items(), results):
+            if isinstance(result, Exception):
+                logger.error(f"Error writing {len(rows)} rows to {table}: {str(result)}")
+
+    def _notify(self, category: str, message: str) -> None:
+        """Queue a Slack notification without waiting for it to be sent.
+        
+        Args:
+            category: Notification category, e.g. 'warning', 'error' or 'optimization'
+            message: Message text
         """
-        handlers = {
+        self._slack_queue.put_nowait((category, message))
+
+    async def _slack_loop(self) -> None:
+        """Send queued Slack notifications, coalescing bursts by category."""
+        while True:
+            try:
+                first = await self._slack_queue.get()
+                await asyncio.sleep(self.SLACK_COALESCE_WINDOW)
+                pending = self._drain_slack_queue()
+                pending.setdefault(first[0], []).insert(0, first[1])
+                await self._send_notifications(pending)
+            except asyncio.CancelledError:
+                break
+            except Exception as e:
+                logger.error(f"Error sending Slack notifications: {str(e)}")
+
+    def _drain_slack_queue(self) -> Dict[str, List[str]]:
+        """Take all queued notifications, grouped by category in arrival order."""
+        pending: Dict[str, List[str]] = {}
+        while True:
+            try:
+                category, message = self._slack_queue.get_nowait()
+            except asyncio.QueueEmpty:
+                return pending
+            pending.setdefault(category, []).append(message)
+
+    async def _send_notifications(self, pending: Dict[str, List[str]]) -> None:
+        """Send one Slack message per category.
+        
+        Args:
+            pending: Queued messages grouped by category
+        """
+        sends = []
+        for category, messages in pending.items():
+            if len(messages) == 1:
+                text = messages[0]
+            else:
+                text = f"{len(messages)} {category} notifications:\n" + "\n".join(f"- {m}" for m in messages)
+            sends.append(self.slack_notifier.send_message(text))
+        
+        # Categories are independent, so one failed send does not hold up the others
+        results = await asyncio.gather(*sends, return_exceptions=True)
+        for category, result in zip(pending, results):
+            if isinstance(result, Exception):
+                logger.error(f"Error sending {category} notifications: {str(result)}")
+
+    @staticmethod
+    def _retry_delay(config: StageConfig, attempt: int) -> float:
+        """Get the jittered backoff before retrying a stage.
+        
+        Cases failing together on a shared outage would otherwise retry in
+        lockstep and hit the recovering service at the same moment. The
+        exponential delay is capped at max_delay, and jitter_factor of it is
+        randomized; the default of 1.0 draws uniformly from [0, delay].
+        
+        Args:
+            config: Configuration of the failed stage
+            attempt: Zero-based number of the attempt that failed
+            
+        Returns:
+            float: Delay in seconds
+        """
+        delay = min(config.backoff_factor ** attempt, config.max_delay)
+        return delay * (1.0 - config.jitter_factor * random.random())
+
+    @cached_property
+    def _stage_handlers(self) -> Dict[str, Callable]:
+        """Stage handlers keyed by stage name, bound once on first dispatch."""
+        return {
             'alert_ingestion': self._handle_alert_ingestion,
             'triage': self._handle_triage,
             'investigation': self._handle_investigation,
             'containment': self._handle_containment,
             'review': self._handle_review
         }
+
+    def _get_stage_handler(self, stage: str) -> Callable:
+        """Get the handler function for a stage.
         
-        handler = handlers.get(stage)
+        Args:
+            stage: Stage name
+            
+        Returns:
+            Callable: Stage handler function
+            
+        Raises:
+            ValueError: If stage is invalid
+        """
+        handler = self._stage_handlers.get(stage)
         if not handler:
             raise ValueError(f"Invalid stage: {stage}")
         return handler
 
     async def _monitor_metrics(self) -> None:
-        """Monitor and analyze agent performance metrics."""
+        """Monitor and analyze agent performance metrics.
+        
+        Wakes when _update_metrics records a failure or a slow stage instead
+        of polling, falling back to METRICS_ANALYSIS_MAX_INTERVAL.
+        """
         while True:
             try:
+                try:
+                    await asyncio.wait_for(self._metrics_event.wait(), self.METRICS_ANALYSIS_MAX_INTERVAL)
+                except asyncio.TimeoutError:
+                    pass
+                self._metrics_event.clear()
                 await self._analyze_performance()
-                await asyncio.sleep(300)  # Check every 5 minutes
+                # Let a burst of failures settle before analyzing again
+                await asyncio.sleep(self.METRICS_ANALYSIS_MIN_INTERVAL)
             except asyncio.CancelledError:
                 break
             except Exception as e:
                 logger.error(f"Error monitoring metrics: {str(e)}")
                 await asyncio.sleep(60)  # Brief delay before retrying
 
-    async def _cleanup_stale_stages(self) -> None:
-        """Clean up stale workflow stages."""
-        while True:
-            try:
-                now = datetime.now()
-                stale_stages = []
-                
-                for stage_id, stage in self.workflow_stages.items():
-                    if (now - stage['start_time']).total_seconds() > 3600:  # 1 hour timeout
-                        stale_stages.append(stage_id)
-                
-                for stage_id in stale_stages:
-                    await self._handle_stage_timeout(stage_id)
-                    del self.workflow_stages[stage_id]
-                
-                await asyncio.sleep(300)  # Check every 5 minutes
-            except asyncio.CancelledError:
-                break
-            except Exception as e:
-                logger.error(f"Error cleaning up stages: {str(e)}")
-                await asyncio.sleep(60)  # Brief delay before retrying
+    def _on_stages_stale(self) -> None:
+        """Timer callback expiring every stage that has run past STAGE_STALE_SECONDS."""
+        self._stale_timer = None
+        now = time.monotonic()
+        while self._stage_deadlines and self._stage_deadlines[0][0] <= now:
+            _, stage_id = heapq.heappop(self._stage_deadlines)
+            if stage_id not in self.workflow_stages:
+                continue  # Stage finished before its deadline
+            task = asyncio.create_task(self._expire_stage(stage_id))
+            self._timeout_tasks.add(task)
+            task.add_done_callback(self._timeout_tasks.discard)
+            task.add_done_callback(_log_task_exception)
+        self._arm_stale_timer()
+
+    async def _expire_stage(self, stage_id: str) -> None:
+        """Handle a stale stage and stop tracking it."""
+        await self._handle_stage_timeout(stage_id)
+        self.workflow_stages.pop(stage_id, None)
 
     async def _handle_stage_timeout(self, stage_id: str) -> None:
         """Handle a stage timeout.
@@ -264,32 +768,105 @@ class CoordinatorAgent:
             logger.warning(f"Stage {stage_id} timed out")
             
             # Update metrics
-            stage_name = stage.get('name', 'unknown')
-            if stage_name in self.metrics:
-                self.metrics[stage_name]['failure'] += 1
+            stage_name = stage.name
+            if stage_name in STAGE_INDEX:
+                self._failure[STAGE_INDEX[stage_name]] += 1
+                self._metrics_version += 1
+                self._metrics_event.set()
             
             # Notify about timeout
-            await self.slack_notifier.send_alert(
-                f"Stage {stage_id} ({stage_name}) timed out after 1 hour",
-                severity="warning"
-            )
+            self._notify('warning', f"Stage {stage_id} ({stage_name}) started at "
+                         f"{stage.started_at:%Y-%m-%d %H:%M:%S} timed out after {self.STAGE_STALE_SECONDS}s")
             
         except Exception as e:
             logger.error(f"Error handling stage timeout: {str(e)}")
 
+    async def get_agent_performance(self) -> Dict[str, Dict[str, Any]]:
+        """Get the success rate, average execution time and status of each stage agent.
+        
+        The result is rebuilt only when metrics or statuses have changed
+        since the previous call.
+        
+        Returns:
+            Dict[str, Dict[str, Any]]: Performance summary keyed by stage name
+        """
+        if self._perf_cache_version != self._metrics_version:
+            totals = self._success + self._failure
+            rates = np.where(totals > 0, self._success / np.maximum(totals, 1), 0.0)
+            self._perf_cache = {
+                agent: {
+                    'success_rate': rate,
+                    'avg_execution_time': avg_time,
+                    'total_executions': total,
+                    'current_status': status
+                }
+                for agent, rate, avg_time, total, status in zip(
+                    STAGE_NAMES, rates.tolist(), self._avg_time.tolist(), totals.tolist(), self._status
+                )
+            }
+            self._perf_cache_version = self._metrics_version
+        return self._perf_cache
+
+    async def optimize_workflow(self) -> Dict[str, Any]:
+        """Get AI recommendations for the stages that miss their thresholds.
+        
+        Returns without an AI call while no stage has run yet or when every
+        stage meets the thresholds.
+        
+        Returns:
+            Dict[str, Any]: {'status': 'idle'} before any executions,
+            {'status': 'optimal'} when no stage needs attention, otherwise
+            the bottlenecks, recommendations and summary
+        """
+        performance = await self.get_agent_performance()
+        if not any(stats['total_executions'] for stats in performance.values()):
+            return {'status': 'idle', 'message': 'No executions yet'}
+        
+        underperforming = {
+            stage: stats for stage, stats in performance.items()
+            if stats['total_executions'] > 0 and (
+                stats['success_rate'] < self.success_rate_threshold or
+                stats['avg_execution_time'] > self.execution_time_threshold
+            )
+        }
+        if not underperforming:
+            return {'status': 'optimal'}
+        
+        recommendations = await self.ai_agent.get_optimization_recommendations({
+            'stage': 'workflow',
+            'focus': 'overall',
+            'metrics': underperforming
+        })
+        return {'status': 'needs_optimization', **recommendations}
+
     async def _analyze_performance(self) -> None:
-        """Analyze agent performance and optimize if needed."""
+        """Analyze agent performance and optimize if needed.
+        
+        Skipped when no metrics have changed since the last analysis, so
+        stages are not optimized again on the same data.
+        """
         try:
-            # Calculate success rates and average times
-            for stage, metrics in self.metrics.items():
-                total = metrics['success'] + metrics['failure']
-                if total > 0:
-                    success_rate = metrics['success'] / total
-                    if success_rate < self.thresholds['success_rate']:
-                        await self._optimize_stage(stage)
-                        
-                    if metrics['avg_time'] > self.thresholds['execution_time']:
-                        await self._optimize_stage(stage, focus='performance')
+            if self._analyzed_version == self._metrics_version:
+                return
+            self._analyzed_version = self._metrics_version
+            
+            # Check success rates and average times of all stages at once;
+            # stages that have not run yet pass both checks
+            totals = self._success + self._failure
+            rates = np.where(totals > 0, self._success / np.maximum(totals, 1), 1.0)
+            reliability_mask = rates < self.success_rate_threshold
+            performance_mask = (totals > 0) & (self._avg_time > self.execution_time_threshold)
+            
+            optimizations = [
+                self._optimize_stage(STAGE_NAMES[i]) for i in np.flatnonzero(reliability_mask)
+            ]
+            optimizations.extend(
+                self._optimize_stage(STAGE_NAMES[i], focus='performance')
+                for i in np.flatnonzero(performance_mask)
+            )
+            
+            # Optimizations are independent, so their AI calls run concurrently
+            await asyncio.gather(*optimizations)
                         
         except Exception as e:
             logger.error(f"Error analyzing performance: {str(e)}")
@@ -297,42 +874,106 @@ class CoordinatorAgent:
     async def _optimize_stage(self, stage: str, focus: str = 'reliability') -> None:
         """Optimize a workflow stage.
         
+        The configuration change comes from OPTIMIZATION_DELTAS, so it is
+        applied without waiting on the AI agent; recommendations are fetched
+        in the background for the log and the Slack notification. Stages
+        optimized for the same focus within STAGE_OPTIMIZATION_COOLDOWN are
+        left alone.
+        
         Args:
             stage: Stage to optimize
             focus: Optimization focus ('reliability' or 'performance')
         """
         try:
-            logger.info(f"Optimizing stage {stage} for {focus}")
-            
-            # Get stage metrics
-            metrics = self.metrics[stage]
+            # Give the last change time to show up in the metrics first
+            now = time.monotonic()
+            last = self._last_optimized.get((stage, focus))
+            if last is not None and now - last < self.STAGE_OPTIMIZATION_COOLDOWN:
+                return
+            self._last_optimized[(stage, focus)] = now
             
-            # Get optimization recommendations
-            recommendations = await self.ai_agent.get_optimization_recommendations({
-                'stage': stage,
-                'focus': focus,
-                'metrics': metrics
-            })
+            logger.info(f"Optimizing stage {stage} for {focus}")
             
-            # Apply recommendations
+            # Apply the configuration change for this focus
+            delta = self.OPTIMIZATION_DELTAS[focus]
             config = self.stage_configs[stage]
-            if focus == 'reliability':
-                config.max_retries += 1
-                config.backoff_factor *= 1.2
-            else:  # performance
-                config.timeout *= 0.8
-            
-            # Log optimization
-            logger.info(f"Applied optimization to {stage}: {recommendations}")
+            config.max_retries = min(
+                config.max_retries + int(delta.get('max_retries_delta', 0)), self.MAX_STAGE_RETRIES
+            )
+            config.backoff_factor = min(
+                config.backoff_factor * delta.get('backoff_mul', 1.0), self.MAX_BACKOFF_FACTOR
+            )
+            config.timeout = max(config.timeout * delta.get('timeout_mul', 1.0), self.MIN_STAGE_TIMEOUT)
+            logger.info(f"Applied optimization to {stage}: {delta}")
             
-            # Notify about optimization
-            await self.slack_notifier.send_message(
-                f"Optimized {stage} stage for {focus}. New configuration: {config}"
+            # Get optimization recommendations off the control loop
+            task = asyncio.create_task(
+                self._record_recommendations(stage, focus, self._stage_metrics(STAGE_INDEX[stage]))
             )
+            self._recommendation_tasks.add(task)
+            task.add_done_callback(self._recommendation_tasks.discard)
+            task.add_done_callback(_log_task_exception)
             
         except Exception as e:
             logger.error(f"Error optimizing stage {stage}: {str(e)}")
 
+    async def _record_recommendations(self, stage: str, focus: str, metrics: AgentMetrics) -> None:
+        """Log the AI recommendations for an optimized stage and announce new ones.
+        
+        Args:
+            stage: Optimized stage
+            focus: Optimization focus ('reliability' or 'performance')
+            metrics: Stage metrics at the time of the optimization
+        """
+        try:
+            recommendations = await self._get_recommendations(stage, focus, metrics)
+            logger.info(f"Recommendations for {stage} ({focus}): {recommendations}")
+            
+            # Notify only when the recommendations differ from the last ones announced
+            config = self.stage_configs[stage]
+            digest = hashlib.blake2b(
+                orjson.dumps(recommendations, option=orjson.OPT_SORT_KEYS, default=str),
+                digest_size=16
+            ).digest()
+            if self._last_recommendation_digest.get((stage, focus)) != digest:
+                self._last_recommendation_digest[(stage, focus)] = digest
+                self._notify('optimization', f"Optimized {stage} stage for {focus}. New configuration: {config}")
+            
+        except Exception as e:
+            logger.error(f"Error getting recommendations for stage {stage}: {str(e)}")
+
+    async def _get_recommendations(self, stage: str, focus: str, metrics: AgentMetrics) -> Dict[str, Any]:
+        """Get optimization recommendations, reusing recent ones for the same condition.
+        
+        The exact metrics change with every execution, so recommendations are
+        keyed on a coarse signature instead: the stage, the focus, the
+        failure count (capped at RECOMMENDATION_MAX_FAILURES) and the average
+        time in whole seconds.
+        
+        Args:
+            stage: Stage to optimize
+            focus: Optimization focus ('reliability' or 'performance')
+            metrics: Current stage metrics
+            
+        Returns:
+            Dict[str, Any]: Optimization recommendations
+        """
+        key: Tuple[str, str, int, int] = (
+            stage,
+            focus,
+            min(metrics['failure'], self.RECOMMENDATION_MAX_FAILURES),
+            round(metrics['avg_time'])
+        )
+        recommendations = self._recommendation_cache.get(key)
+        if recommendations is None:
+            recommendations = await self.ai_agent.get_optimization_recommendations({
+                'stage': stage,
+                'focus': focus,
+                'metrics': metrics
+            })
+            self._recommendation_cache[key] = recommendations
+        return recommendations
+
     async def _handle_case_failure(self, case: Dict[str, Any], error: str) -> None:
         """Handle a case processing failure.
         
@@ -341,20 +982,21 @@ class CoordinatorAgent:
             error: Error message
         """
         try:
-            case_id = case.get('external_id', 'unknown')
+            case_id = case.get('external_id')
             
-            # Update case status
-            await self.supabase.table('cases').update({
-                'status': 'failed',
-                'error_message': error,
-                'modified_at': datetime.now().isoformat()
-            }).eq('external_id', case_id).execute()
+            # Queue the status update of stored cases; failures are written in batches
+            if case_id:
+                self._db_write_queue.put_nowait(('cases', {
+                    'external_id': case_id,
+                    'status': 'failed',
+                    'error_message': error,
+                    'modified_at': datetime.now().isoformat()
+                }))
+            else:
+                case_id = 'unknown'
             
             # Send notification
-            await self.slack_notifier.send_alert(
-                f"Case {case_id} processing failed: {error}",
-                severity="error"
-            )
+            self._notify('error', f"Case {case_id} processing failed: {error}")
             
         except Exception as e:
             logger.error(f"Error handling case failure: {str(e)}")
@@ -1,30 +1,44 @@
-from typing import Dict, Any, List
-from api_client import APIClient
+from typing import Dict, Any, List, Optional
+from api_client import APIClient, get_api_client
 from openai_agent import OpenAIAgent
 from config import settings
 import logging
-from datetime import datetime
+from datetime import datetime, timezone
 import asyncio
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 class InvestigationAgent:
-    def __init__(self):
-        self.api_client = APIClient()
+    def __init__(self, api_client: Optional[APIClient] = None):
+        self.api_client = api_client or get_api_client()
         self.ai_agent = OpenAIAgent()
+        self._inflight: Dict[str, asyncio.Future] = {}
 
     async def investigate_case(self, case_id: str) -> Dict[str, Any]:
         """
         Investigate a case by gathering and analyzing all relevant information.
         Returns a dictionary containing investigation results and recommendations.
+        Concurrent calls for the same case share a single investigation.
         """
+        inflight = self._inflight.get(case_id)
+        if inflight is None:
+            inflight = asyncio.ensure_future(self._investigate_case(case_id))
+            self._inflight[case_id] = inflight
+            inflight.add_done_callback(lambda _: self._inflight.pop(case_id, None))
+        # Shield so one cancelled caller does not cancel the shared investigation
+        return await asyncio.shield(inflight)
+
+    async def _investigate_case(self, case_id: str) -> Dict[str, Any]:
+        """Gather case information and run the AI analysis."""
         try:
-            # Gather all case information
-            case_data = self.api_client.get_case(case_id)
-            case_summary = self.api_client.get_case_summary(case_id)
-            case_alerts = self.api_client.get_case_alerts(case_id)
-            case_activities = self.api_client.get_case_activities(case_id)
+            # Gather all case information concurrently
+            case_data, case_summary, case_alerts, case_activities = await asyncio.gather(
+                self.api_client.get_case_async(case_id),
+                self.api_client.get_case_summary_async(case_id),
+                self.api_client.get_case_alerts_async(case_id),
+                self.api_client.get_case_activities_async(case_id)
+            )
 
             # Prepare data for AI analysis
             analysis_data = self._prepare_analysis_data(
@@ -50,7 +64,7 @@ class InvestigationAgent:
                 "risk_factors": ai_analysis["risk_factors"],
                 "recommendations": ai_analysis["recommendations"],
                 "analysis_summary": ai_analysis["analysis_summary"],
-                "investigation_time": datetime.utcnow().isoformat()
+                "investigation_time": datetime.now(timezone.utc).isoformat(timespec="seconds")
             }
 
             logger.info(f"Completed investigation for case {case_id}")
@@ -0,0 +1,32 @@
+-- Wrap all operations in a transaction
+BEGIN;
+
+-- Alerts, observables and activities are upserted on their API ID within a
+-- case (external_id), which needs a unique index to resolve conflicts on.
+ALTER TABLE alerts ADD COLUMN IF NOT EXISTS external_id TEXT;
+ALTER TABLE observables ADD COLUMN IF NOT EXISTS external_id TEXT;
+-- schema.sql links observables to alerts only; the case processor stores them per case
+ALTER TABLE observables ADD COLUMN IF NOT EXISTS case_id UUID REFERENCES cases(id);
+
+-- Rows stored before this migration may repeat an API ID; keep the newest copy
+DELETE FROM alerts a USING alerts b
+WHERE a.case_id = b.case_id AND a.external_id = b.external_id AND a.ctid < b.ctid;
+DELETE FROM observables a USING observables b
+WHERE a.case_id = b.case_id AND a.external_id = b.external_id AND a.ctid < b.ctid;
+
+CREATE UNIQUE INDEX IF NOT EXISTS alerts_case_id_external_id_idx ON alerts(case_id, external_id);
+CREATE UNIQUE INDEX IF NOT EXISTS observables_case_id_external_id_idx ON observables(case_id, external_id);
+
+-- The activities table is created outside schema.sql, so only index it where it exists
+DO $$
+BEGIN
+    IF to_regclass('activities') IS NOT NULL THEN
+        ALTER TABLE activities ADD COLUMN IF NOT EXISTS external_id TEXT;
+        DELETE FROM activities a USING activities b
+        WHERE a.case_id = b.case_id AND a.external_id = b.external_id AND a.ctid < b.ctid;
+        CREATE UNIQUE INDEX IF NOT EXISTS activities_case_id_external_id_idx
+            ON activities(case_id, external_id);
+    END IF;
+END $$;
+
+COMMIT;
@@ -0,0 +1,85 @@
+-- Wrap all operations in a transaction
+BEGIN;
+
+-- Conflict target of the alert upsert in upsert_case_bundle; also created by
+-- add_case_row_external_ids.sql
+CREATE UNIQUE INDEX IF NOT EXISTS alerts_case_id_external_id_idx ON alerts(case_id, external_id);
+
+-- Store a case with its alerts, analysis and recommended actions in one call.
+-- The case is upserted on external_id; returns the case UUID.
+CREATE OR REPLACE FUNCTION upsert_case_bundle(
+    p_case JSONB,
+    p_alerts JSONB DEFAULT '[]'::jsonb,
+    p_analysis JSONB DEFAULT NULL,
+    p_actions JSONB DEFAULT '[]'::jsonb
+) RETURNS UUID AS $$
+DECLARE
+    v_case_id UUID;
+BEGIN
+    INSERT INTO cases (external_id, title, severity, status, summary, metadata)
+    VALUES (
+        p_case->>'external_id',
+        p_case->>'title',
+        p_case->>'severity',
+        p_case->>'status',
+        p_case->'summary',
+        p_case->'metadata'
+    )
+    ON CONFLICT (external_id) DO UPDATE SET
+        title = EXCLUDED.title,
+        severity = EXCLUDED.severity,
+        status = EXCLUDED.status,
+        summary = EXCLUDED.summary,
+        metadata = EXCLUDED.metadata,
+        modified_at = timezone('utc'::text, now())
+    RETURNING id INTO v_case_id;
+
+    -- Alerts are matched on their API ID within the case, so collecting a
+    -- case again updates its alerts instead of duplicating them
+    INSERT INTO alerts (case_id, external_id, title, severity, details)
+    SELECT v_case_id, a->>'external_id', a->>'title', a->>'severity', a->'details'
+    FROM jsonb_array_elements(COALESCE(p_alerts, '[]'::jsonb)) AS a
+    ON CONFLICT (case_id, external_id) DO UPDATE SET
+        title = EXCLUDED.title,
+        severity = EXCLUDED.severity,
+        details = EXCLUDED.details;
+
+    IF p_analysis IS NOT NULL THEN
+        INSERT INTO analysis_results (case_id, severity_score, priority_score, key_indicators, patterns)
+        VALUES (
+            v_case_id,
+            (p_analysis->>'severity_score')::float,
+            (p_analysis->>'priority_score')::float,
+            p_analysis->'key_indicators',
+            p_analysis->'patterns'
+        );
+    END IF;
+
+    INSERT INTO action_items (case_id, action_type, description, priority, status)
+    SELECT v_case_id, a->>'action_type', a->>'description', a->>'priority',
+           COALESCE(a->>'status', 'pending')
+    FROM jsonb_array_elements(COALESCE(p_actions, '[]'::jsonb)) AS a;
+
+    RETURN v_case_id;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Store many case bundles in one call. Each item has "case", "alerts",
+-- "analysis" and "actions" keys; returns the case UUIDs in input order.
+CREATE OR REPLACE FUNCTION upsert_case_bundles(items JSONB)
+RETURNS SETOF UUID AS $$
+DECLARE
+    item JSONB;
+BEGIN
+    FOR item IN SELECT * FROM jsonb_array_elements(items) LOOP
+        RETURN NEXT upsert_case_bundle(
+            item->'case',
+            item->'alerts',
+            NULLIF(item->'analysis', 'null'::jsonb),
+            item->'actions'
+        );
+    END LOOP;
+END;
+$$ LANGUAGE plpgsql;
+
+COMMIT;
@@ -1,24 +1,32 @@
 import datetime
+from collections import Counter
 from typing import Dict, Any, List, Optional
 import uuid
 
 class MockSupabase:
     def __init__(self):
         self.workflows = {}
+        self._status_counts: Counter = Counter()  # Workflows per status, kept in step with writes
         self.error_logs = {}
         self.agent_metrics = {}
+        self.tables = {}
 
     async def create_workflow(self, workflow_data: Dict[str, Any]) -> Dict[str, Any]:
         """Create a new workflow record."""
         workflow_id = str(uuid.uuid4())
         self.workflows[workflow_id] = {**workflow_data, 'id': workflow_id}
+        self._status_counts[workflow_data.get('status')] += 1
         return self.workflows[workflow_id]
 
     async def update_workflow(self, workflow_id: str, update_data: Dict[str, Any]) -> Dict[str, Any]:
         """Update a workflow record."""
         if workflow_id not in self.workflows:
             return None
-        self.workflows[workflow_id].update(update_data)
+        workflow = self.workflows[workflow_id]
+        if 'status' in update_data:
+            self._status_counts[workflow.get('status')] -= 1
+            self._status_counts[update_data['status']] += 1
+        workflow.update(update_data)
         return self.workflows[workflow_id]
 
     async def create_error_log(self, error_data: Dict[str, Any]) -> Dict[str, Any]:
@@ -38,12 +46,22 @@ class MockSupabase:
         self.agent_metrics[agent_name].update(metrics)
         return self.agent_metrics[agent_name]
 
+    async def update_rows(self, table: str, rows: List[Dict[str, Any]], key: str) -> List[Dict[str, Any]]:
+        """Update existing rows of a table, matched on a key column."""
+        stored = self.tables.setdefault(table, {})
+        updated = []
+        for row in rows:
+            if row[key] in stored:
+                stored[row[key]].update(row)
+                updated.append(stored[row[key]])
+        return updated
+
     async def get_workflow_metrics(self, start_time: datetime.datetime, end_time: datetime.datetime) -> Dict[str, Any]:
         """Get workflow metrics for a time period."""
         return {
             'total_workflows': len(self.workflows),
-            'successful_workflows': len([w for w in self.workflows.values() if w.get('status') == 'completed']),
-            'failed_workflows': len([w for w in self.workflows.values() if w.get('status') == 'error']),
+            'successful_workflows': self._status_counts['completed'],
+            'failed_workflows': self._status_counts['error'],
             'average_completion_time': 120.0,  # Mock 2 minutes average
             'stage_metrics': {
                 'alert_ingestion': {'avg_time': 20.0, 'success_rate': 100.0},
@@ -1,62 +1,147 @@
-from slack_sdk import WebClient
+import asyncio
+from slack_sdk.web.async_client import AsyncWebClient
 from slack_sdk.errors import SlackApiError
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional, Tuple
 from config import settings
-from api_client import APIClient
+from api_client import APIClient, get_api_client
 import logging
 from datetime import datetime
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+SEVERITY_EMOJI = {
+    "Critical": "🔴",
+    "High": "🟠",
+    "Medium": "🟡",
+    "Low": "🔵"
+}
+
+def _bulleted(header: str, items: List[Any]) -> str:
+    """Format a header line followed by one bullet per item."""
+    return header + "\n• " + "\n• ".join(map(str, items)) if items else header + "\n"
+
 class NotificationAgent:
-    def __init__(self):
-        self.slack_client = WebClient(token=settings.SLACK_TOKEN)
-        self.api_client = APIClient()
+    # Escalations arriving within this window are posted as one Slack message
+    ESCALATION_BATCH_WINDOW = 0.5
+    # Each escalation takes up to 5 blocks; Slack allows 50 per message
+    MAX_ESCALATIONS_PER_MESSAGE = 10
+
+    def __init__(self, api_client: Optional[APIClient] = None):
+        self.slack_client = AsyncWebClient(token=settings.SLACK_TOKEN)
+        self.api_client = api_client or get_api_client()
+        self._escalation_queue: Optional[asyncio.Queue] = None
+        self._escalation_task: Optional[asyncio.Task] = None
 
-    def notify_case_escalation(self, investigation_results: Dict[str, Any]) -> bool:
+    async def notify_case_escalation(self, investigation_results: Dict[str, Any]) -> bool:
         """
         Send a notification to Slack about a case that needs human attention.
+        Escalations queued within ESCALATION_BATCH_WINDOW are posted together.
         Returns True if notification was successful.
         """
+        if self._escalation_task is None or self._escalation_task.done():
+            self._escalation_queue = asyncio.Queue()
+            self._escalation_task = asyncio.create_task(self._escalation_loop())
+
+        future = asyncio.get_running_loop().create_future()
+        await self._escalation_queue.put((investigation_results, future))
+        return await future
+
+    async def aclose(self) -> None:
+        """Stop the escalation loop, posting escalations still queued."""
+        if self._escalation_task is None:
+            return
+        # None tells the loop to post what it holds and exit
+        await self._escalation_queue.put(None)
+        await asyncio.gather(self._escalation_task, return_exceptions=True)
+        self._escalation_task = None
+        pending = []
+        while not self._escalation_queue.empty():
+            item = self._escalation_queue.get_nowait()
+            if item is not None:
+                pending.append(item)
+        for start in range(0, len(pending), self.MAX_ESCALATIONS_PER_MESSAGE):
+            await self._post_escalations(pending[start:start + self.MAX_ESCALATIONS_PER_MESSAGE])
+
+    async def _escalation_loop(self) -> None:
+        """Collect queued escalations and post each batch as one message.
+        
+        Runs until a None item is dequeued. Escalations held by the loop when
+        it stops early are resolved as not sent, so their callers never hang.
+        """
+        batch = []
+        try:
+            while True:
+                item = await self._escalation_queue.get()
+                if item is None:
+                    return
+                batch = [item]
+                await asyncio.sleep(self.ESCALATION_BATCH_WINDOW)
+                closing = False
+                while len(batch) < self.MAX_ESCALATIONS_PER_MESSAGE and not self._escalation_queue.empty():
+                    item = self._escalation_queue.get_nowait()
+                    if item is None:
+                        closing = True
+                        break
+                    batch.append(item)
+                await self._post_escalations(batch)
+                batch = []
+                if closing:
+                    return
+        finally:
+            for _, future in batch:
+                if not future.done():
+                    future.set_result(False)
+
+    async def _post_escalations(self, batch: List[Tuple[Dict[str, Any], asyncio.Future]]) -> None:
+        """Post a batch of escalations to Slack and update the escalated cases."""
         try:
             # Format the message
-            blocks = self._format_slack_message(investigation_results)
+            blocks = [block for results, _ in batch for block in self._format_slack_message(results)]
+            if len(batch) == 1:
+                text = f"Security Case Escalation: Case #{batch[0][0]['ticket_id']}"
+            else:
+                text = f"Security Case Escalations: {len(batch)} cases"
             
             # Send to Slack
-            response = self.slack_client.chat_postMessage(
+            response = await self.slack_client.chat_postMessage(
                 channel=settings.SLACK_CHANNEL,
-                text=f"Security Case Escalation: Case #{investigation_results['ticket_id']}",
+                text=text,
                 blocks=blocks
             )
-            
-            if response["ok"]:
-                # Update case with escalation information
-                case_id = investigation_results["case_id"]
-                self._update_case_escalation(case_id, investigation_results["risk_factors"])
-                logger.info(f"Successfully notified about case {case_id}")
-                return True
-            
-            return False
+            sent = bool(response["ok"])
 
         except SlackApiError as e:
             logger.error(f"Error sending Slack notification: {str(e)}")
-            return False
+            sent = False
         except Exception as e:
             logger.error(f"Error in notification process: {str(e)}")
+            sent = False
+
+        if sent:
+            # Update cases with escalation information
+            outcomes = await asyncio.gather(*(self._escalate(results) for results, _ in batch))
+        else:
+            outcomes = [False] * len(batch)
+        for (_, future), outcome in zip(batch, outcomes):
+            if not future.done():
+                future.set_result(outcome)
+
+    async def _escalate(self, results: Dict[str, Any]) -> bool:
+        """Update a notified case with escalation information."""
+        case_id = results["case_id"]
+        try:
+            await asyncio.to_thread(self._update_case_escalation, case_id, results["risk_factors"])
+        except Exception as e:
+            logger.error(f"Error escalating case {case_id}: {str(e)}")
             return False
+        logger.info(f"Successfully notified about case {case_id}")
+        return True
 
     def _format_slack_message(self, results: Dict[str, Any]) -> List[Dict[str, Any]]:
         """Format the investigation results into Slack blocks."""
-        severity_emoji = {
-            "Critical": "🔴",
-            "High": "🟠",
-            "Medium": "🟡",
-            "Low": "🔵"
-        }
-
         severity = results.get("severity", "Unknown")
-        emoji = severity_emoji.get(severity, "⚪")
+        emoji = SEVERITY_EMOJI.get(severity, "⚪")
         
         blocks = [
             {
@@ -91,7 +176,7 @@ class NotificationAgent:
                 "type": "section",
                 "text": {
                     "type": "mrkdwn",
-                    "text": "*Risk Factors:*\n" + "\n".join(f"• {factor}" for factor in results['risk_factors'])
+                    "text": _bulleted("*Risk Factors:*", results['risk_factors'])
                 }
             }
         ]
@@ -101,7 +186,7 @@ class NotificationAgent:
                 "type": "section",
                 "text": {
                     "type": "mrkdwn",
-                    "text": "*Kill Chain Stages:*\n" + "\n".join(f"• {stage}" for stage in results['kill_chain_stages'])
+                    "text": _bulleted("*Kill Chain Stages:*", results['kill_chain_stages'])
                 }
             })
 
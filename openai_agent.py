@@ -1,64 +1,175 @@
-from typing import Dict, Any, List
+from typing import Dict, Any, AsyncIterator, List, Optional, Set, Tuple
+import asyncio
+import hashlib
 import openai
+import orjson
+from cachetools import TTLCache
 from config import settings
 import logging
-import json
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 class OpenAIAgent:
+    # Requests arriving within this window are sent to OpenAI as one burst
+    MAX_BATCH_WAIT = 0.02
+    MAX_BATCH_SIZE = 16
+
+    SYSTEM_PROMPT = """You are an expert security analyst AI assistant. Your task is to:
+1. Analyze security case data including alerts, kill chain information, and observables
+2. Identify risk factors and potential threats
+3. Determine if human intervention is needed
+4. Provide clear recommendations
+
+Format your response as a JSON object with the following structure:
+{
+    "risk_level": "high|medium|low",
+    "needs_human": true|false,
+    "risk_factors": ["list of risk factors"],
+    "recommendations": ["list of recommendations"],
+    "analysis_summary": "brief analysis summary"
+}"""
+
+    # Analyses reused for identical cases, e.g. when an investigation is retried
+    ANALYSIS_CACHE_SIZE = 4096
+    ANALYSIS_CACHE_TTL = 3600
+
     def __init__(self):
         openai.api_key = settings.OPENAI_API_KEY
         self.model = settings.OPENAI_MODEL
+        self._batch_queue: Optional[asyncio.Queue] = None
+        self._batch_task: Optional[asyncio.Task] = None
+        self._inflight: Set[asyncio.Task] = set()
+        self._cache: TTLCache = TTLCache(maxsize=self.ANALYSIS_CACHE_SIZE, ttl=self.ANALYSIS_CACHE_TTL)
+        self._pending: Dict[str, asyncio.Future] = {}
 
     async def analyze_case(self, case_data: Dict[str, Any]) -> Dict[str, Any]:
         """
         Analyze case data using OpenAI to determine risk level and recommendations.
+
+        Results are cached by case fingerprint, and concurrent calls for the
+        same fingerprint share one request. Cache misses are collected for up
+        to MAX_BATCH_WAIT seconds and their requests issued together, so a
+        burst of investigations shares the connection setup instead of
+        trickling out one at a time.
         """
+        key = self._case_fingerprint(case_data)
+        cached = self._cache.get(key)
+        if cached is not None:
+            return cached
+
+        pending = self._pending.get(key)
+        if pending is None:
+            pending = asyncio.ensure_future(self._submit(case_data))
+            self._pending[key] = pending
+            pending.add_done_callback(lambda future: self._finish_pending(key, future))
+        # Shield so one cancelled caller does not cancel the shared request
+        return await asyncio.shield(pending)
+
+    @staticmethod
+    def _case_fingerprint(case_data: Dict[str, Any]) -> str:
+        """Hash the case fields that determine its analysis."""
+        fields = {
+            "severity": case_data.get("severity"),
+            "score": case_data.get("score"),
+            "kill_chain_stages": case_data.get("kill_chain_stages", []),
+            "alert_ids": sorted(str(alert.get("_id")) for alert in case_data.get("alerts", []))
+        }
+        encoded = orjson.dumps(fields, option=orjson.OPT_SORT_KEYS, default=str)
+        return hashlib.blake2b(encoded, digest_size=16).hexdigest()
+
+    def _finish_pending(self, key: str, future: asyncio.Future) -> None:
+        """Cache a completed shared request and stop tracking it."""
+        self._pending.pop(key, None)
+        if not future.cancelled() and future.exception() is None:
+            self._cache[key] = future.result()
+
+    async def _submit(self, case_data: Dict[str, Any]) -> Dict[str, Any]:
+        """Queue a case for the next analysis batch and wait for its result."""
+        if self._batch_task is None or self._batch_task.done():
+            self._batch_queue = asyncio.Queue()
+            self._batch_task = asyncio.create_task(self._batch_loop())
+
+        future = asyncio.get_running_loop().create_future()
+        await self._batch_queue.put((case_data, future))
+        return await future
+
+    async def aclose(self) -> None:
+        """Stop the batching loop and wait for in-flight requests."""
+        if self._batch_task is not None:
+            self._batch_task.cancel()
+            await asyncio.gather(self._batch_task, return_exceptions=True)
+            self._batch_task = None
+        if self._inflight:
+            await asyncio.gather(*self._inflight, return_exceptions=True)
+
+    async def _batch_loop(self) -> None:
+        """Group queued analysis requests and dispatch each group together."""
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._batch_queue.get()]
+            deadline = loop.time() + self.MAX_BATCH_WAIT
+            while len(batch) < self.MAX_BATCH_SIZE:
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._batch_queue.get(), remaining))
+                except asyncio.TimeoutError:
+                    break
+
+            # Keep collecting the next batch while this one is in flight
+            task = asyncio.create_task(self._run_batch(batch))
+            self._inflight.add(task)
+            task.add_done_callback(self._inflight.discard)
+
+    async def _run_batch(self, batch: List[Tuple[Dict[str, Any], asyncio.Future]]) -> None:
+        """Analyze a batch of cases concurrently and resolve each caller's future."""
+        results = await asyncio.gather(
+            *(self._analyze_single(case_data) for case_data, _ in batch),
+            return_exceptions=True
+        )
+        for (_, future), result in zip(batch, results):
+            if future.done():  # Caller was cancelled
+                continue
+            if isinstance(result, BaseException):
+                future.set_exception(result)
+            else:
+                future.set_result(result)
+
+    async def _analyze_single(self, case_data: Dict[str, Any]) -> Dict[str, Any]:
+        """Send one case to OpenAI and parse the analysis."""
         try:
             # Prepare the prompt
             prompt = self._create_analysis_prompt(case_data)
             
-            # Call OpenAI API
-            response = await openai.ChatCompletion.acreate(
+            # Call OpenAI API; JSON mode guarantees the streamed text is one JSON object
+            stream = await openai.ChatCompletion.acreate(
                 model=self.model,
                 messages=[
-                    {"role": "system", "content": self._get_system_prompt()},
+                    {"role": "system", "content": self.SYSTEM_PROMPT},
                     {"role": "user", "content": prompt}
                 ],
                 temperature=0.3,
-                max_tokens=1000
+                max_tokens=1000,
+                response_format={"type": "json_object"},
+                stream=True
             )
             
-            # Parse the response
-            analysis = self._parse_analysis_response(response.choices[0].message.content)
-            return analysis
+            # Parse the response as it streams in
+            return await self._read_analysis_stream(stream)
             
         except Exception as e:
             logger.error(f"Error in OpenAI analysis: {str(e)}")
             raise
 
-    def _get_system_prompt(self) -> str:
-        return """You are an expert security analyst AI assistant. Your task is to:
-1. Analyze security case data including alerts, kill chain information, and observables
-2. Identify risk factors and potential threats
-3. Determine if human intervention is needed
-4. Provide clear recommendations
-
-Format your response as a JSON object with the following structure:
-{
-    "risk_level": "high|medium|low",
-    "needs_human": true|false,
-    "risk_factors": ["list of risk factors"],
-    "recommendations": ["list of recommendations"],
-    "analysis_summary": "brief analysis summary"
-}"""
-
     def _create_analysis_prompt(self, case_data: Dict[str, Any]) -> str:
         """Create a detailed prompt from case data."""
         alerts = case_data.get("alerts", [])
         kill_chain = case_data.get("kill_chain_stages", [])
+        # Compact JSON keeps the prompt, and the billed tokens, small; only the first 5 alerts are shown
+        kill_chain_json = orjson.dumps(kill_chain).decode()
+        alerts_json = orjson.dumps(alerts[:5]).decode()
         
         prompt = f"""Please analyze this security case:
 
@@ -67,10 +178,10 @@ Case Score: {case_data.get('score')}
 Number of Alerts: {len(alerts)}
 
 Kill Chain Stages:
-{json.dumps(kill_chain, indent=2)}
+{kill_chain_json}
 
 Alert Details:
-{json.dumps(alerts[:5], indent=2)}  # Show first 5 alerts
+{alerts_json}
 
 Key Considerations:
 1. Are there critical kill chain stages present?
@@ -82,22 +193,47 @@ Please analyze this data and provide your assessment."""
 
         return prompt
 
+    async def _read_analysis_stream(self, stream: AsyncIterator[Dict[str, Any]]) -> Dict[str, Any]:
+        """Read a streamed completion, returning as soon as its JSON object is complete."""
+        parts: List[str] = []
+        try:
+            async for chunk in stream:
+                delta = chunk["choices"][0]["delta"].get("content") or ""
+                parts.append(delta)
+                # The object can only be complete once a closing brace arrives
+                if "}" not in delta:
+                    continue
+                try:
+                    response_json = orjson.loads("".join(parts))
+                except orjson.JSONDecodeError:
+                    continue
+                return self._validate_analysis(response_json)
+        finally:
+            aclose = getattr(stream, "aclose", None)
+            if aclose:
+                await aclose()
+        
+        # Stream ended without a complete object; use the regular parse and fallback
+        return self._parse_analysis_response("".join(parts))
+
+    @staticmethod
+    def _validate_analysis(response_json: Dict[str, Any]) -> Dict[str, Any]:
+        """Check that a parsed analysis has all required fields."""
+        required_fields = ["risk_level", "needs_human", "risk_factors", 
+                         "recommendations", "analysis_summary"]
+        for field in required_fields:
+            if field not in response_json:
+                raise ValueError(f"Missing required field: {field}")
+        return response_json
+
     def _parse_analysis_response(self, response_text: str) -> Dict[str, Any]:
         """Parse the OpenAI response into a structured format."""
         try:
             # Extract JSON from response
-            response_json = json.loads(response_text)
-            
-            # Validate required fields
-            required_fields = ["risk_level", "needs_human", "risk_factors", 
-                             "recommendations", "analysis_summary"]
-            for field in required_fields:
-                if field not in response_json:
-                    raise ValueError(f"Missing required field: {field}")
-            
-            return response_json
+            response_json = orjson.loads(response_text)
+            return self._validate_analysis(response_json)
             
-        except json.JSONDecodeError:
+        except orjson.JSONDecodeError:
             logger.error("Failed to parse OpenAI response as JSON")
             # Provide a fallback response
             return {
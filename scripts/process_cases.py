@@ -1,7 +1,6 @@
 """Script for processing security cases and their associated data."""
 import asyncio
 import logging
-from dotenv import load_dotenv
 from datetime import datetime, timedelta
 from typing import Dict, Any, List, Optional
 from uuid import uuid4
@@ -13,6 +12,9 @@ from src.agents.decision_agent import DecisionAgent
 from src.agents.ai_agent import AIAgent
 from src.clients.auth import AuthManager
 from src.config.settings import load_settings
+from src.utils.event_loop import install_uvloop
+from src.utils.rate_limiter import TokenBucket
+from src.utils.env import load_env
 
 logger = logging.getLogger(__name__)
 
@@ -28,7 +30,8 @@ class CaseProcessor:
         self.ai_agent = AIAgent()
         self.decision_agent = DecisionAgent(api_client, supabase, self.registry)
         self.last_processed_time = datetime.now() - timedelta(days=7)  # Default to last 7 days
-        self.semaphore = asyncio.Semaphore(3)  # Reduce concurrent operations from 5 to 3
+        self._case_uuid_cache: Dict[str, str] = {}  # External case ID -> Supabase case UUID
+        self._api_bucket = TokenBucket(rate_per_sec=5, burst=10)  # Paces alert/observable fetches
 
     async def process_cases(self, limit: int = 1) -> None:
         """Process a batch of cases.
@@ -84,108 +87,127 @@ class CaseProcessor:
             except Exception as e:
                 logger.error(f"Error updating case {case_id} status: {e}")
 
+            # Store the case once to get its UUID for all alerts, observables and activities
+            try:
+                case_uuid = await self._get_case_uuid(case)
+            except Exception as e:
+                logger.error(f"Error storing case {case_id} in Supabase, skipping its alerts, observables and activities: {e}")
+                return
+
             # Process alerts and observables regardless of decision
-            await self.process_case_alerts(case)
-            await self.process_case_observables(case)
+            await self.process_case_alerts(case, case_uuid)
+            await self.process_case_observables(case, case_uuid)
 
             # Only process activities if needed
             if decisions["needs_investigation"]:
-                await self.process_case_activities(case)
+                await self.process_case_activities(case, case_uuid)
 
         except Exception as e:
             logger.error(f"Error processing case {case_id}: {e}")
             raise
 
-    async def process_case_alerts(self, case: Dict[str, Any]) -> None:
+    async def _get_case_uuid(self, case: Dict[str, Any]) -> str:
+        """Get the Supabase UUID of a case, upserting the case on first use.
+        
+        Upserting rather than looking the case up means a case not stored
+        yet is created instead of failing its alerts, observables and
+        activities.
+        
+        Args:
+            case: The case data from the list_cases API
+            
+        Returns:
+            str: Supabase case UUID
+        """
+        case_id = case['_id']
+        case_uuid = self._case_uuid_cache.get(case_id)
+        if case_uuid is None:
+            await self._api_bucket.acquire()
+            summary = await self.api.get_case_summary(case_id)
+            case_uuid = await self.supabase.upsert_case_data(case_id, case, summary)
+            self._case_uuid_cache[case_id] = case_uuid
+        return case_uuid
+
+    async def process_case_alerts(self, case: Dict[str, Any], case_uuid: str) -> None:
         """Process all alerts for a case with pagination.
         
+        Each page of alerts is stored with a single bulk upsert. Fetching and
+        storing run as a pipeline, so the next page is fetched from the API
+        while the previous one is being stored.
+        
         Args:
             case: The case data from the list_cases API
+            case_uuid: Supabase UUID of the case
         """
-        skip = 0
-        batch_size = 5  # Reduced from 10 to 5
+        batch_size = 50  # The alerts API returns at most 50 per page
         total_alerts = 0
+        # Holds at most two fetched pages; an empty page marks the end
+        pages: asyncio.Queue = asyncio.Queue(maxsize=2)
 
-        while True:
-            alerts = await self.api.get_case_alerts(case['_id'], skip=skip, limit=batch_size)
-            if not alerts:
-                break
+        async def fetch_pages() -> None:
+            skip = 0
+            while True:
+                await self._api_bucket.acquire()
+                alerts = await self.api.get_case_alerts(case['_id'], skip=skip, limit=batch_size)
+                await pages.put(alerts)
+                if not alerts:
+                    return
+                # Advance by what was returned, in case the API caps the page size
+                skip += len(alerts)
 
-            # Process alerts concurrently with semaphore
-            tasks = []
-            for alert in alerts:
-                tasks.append(self._process_single_alert(case['_id'], alert))
-            
-            # Wait for all alerts in this batch to complete
-            results = await asyncio.gather(*tasks, return_exceptions=True)
-            
-            # Count successful upserts
-            total_alerts += sum(1 for r in results if not isinstance(r, Exception))
-            
-            # Log any errors
-            for i, result in enumerate(results):
-                if isinstance(result, Exception):
-                    logger.error(f"Error processing alert {i} for case {case['_id']}: {result}")
+        async def store_pages() -> None:
+            nonlocal total_alerts
+            skip = 0
+            while alerts := await pages.get():
+                try:
+                    await self.supabase.upsert_alerts_bulk(case['_id'], case_uuid, alerts)
+                    total_alerts += len(alerts)
+                except Exception as e:
+                    logger.error(f"Error processing alerts {skip}-{skip + len(alerts) - 1} for case {case['_id']}: {e}")
 
-            skip += batch_size
-            logger.info(f"Processed {total_alerts} alerts for case {case['_id']}")
-            
-            # Increased delay between batches
-            await asyncio.sleep(1.0)  # Increased from 0.5 to 1.0 seconds
+                skip += len(alerts)
+                logger.info(f"Processed {total_alerts} alerts for case {case['_id']}")
 
-    async def _process_single_alert(self, case_id: str, alert: Dict[str, Any]) -> None:
-        """Process a single alert with concurrency control.
-        
-        Args:
-            case_id: External case ID
-            alert: Alert data to process
-        """
-        async with self.semaphore:
-            # Get case UUID from Supabase
-            case_data = await self.supabase.client.table("cases").select("id").eq("case_id", case_id).execute()
-            if not case_data.data:
-                raise ValueError(f"Case {case_id} not found in Supabase")
-            case_uuid = case_data.data[0]["id"]
-            await self.supabase.upsert_alert_data(case_id, case_uuid, alert)
+        # A failed fetch cancels the storing side instead of leaving it waiting
+        try:
+            async with asyncio.TaskGroup() as tg:
+                tg.create_task(fetch_pages())
+                tg.create_task(store_pages())
+        except ExceptionGroup as e:
+            # Callers handle a single error; log any others so they are not lost
+            for error in e.exceptions[1:]:
+                logger.error(f"Alert pipeline for case {case['_id']} also failed: {error}", exc_info=error)
+            raise e.exceptions[0]
 
-    async def process_case_observables(self, case: Dict[str, Any]) -> None:
+    async def process_case_observables(self, case: Dict[str, Any], case_uuid: str) -> None:
         """Process all observables for a case.
         
+        Observables are stored in batches, one bulk upsert per batch.
+        
         Args:
             case: The case data from the list_cases API
+            case_uuid: Supabase UUID of the case
         """
         try:
             logger.info(f"Fetching observables for case {case['_id']}")
+            await self._api_bucket.acquire()
             observables = await self.api.get_case_observables(case['_id'])
             logger.info(f"Found {len(observables)} observables for case {case['_id']}")
             
             total_observables = 0
             
-            # Process observables in batches of 10
-            batch_size = 10
+            # Process observables in batches of 100
+            batch_size = 100
             for i in range(0, len(observables), batch_size):
                 batch = observables[i:i + batch_size]
                 logger.info(f"Processing batch {i//batch_size + 1} of observables for case {case['_id']}")
                 
-                # Process batch concurrently
-                tasks = []
-                for observable in batch:
-                    tasks.append(self._process_single_observable(case['_id'], observable))
-                
-                # Wait for batch to complete
-                results = await asyncio.gather(*tasks, return_exceptions=True)
-                
-                # Count successful upserts and log errors
-                batch_success = sum(1 for r in results if not isinstance(r, Exception))
-                total_observables += batch_success
-                logger.info(f"Successfully processed {batch_success}/{len(batch)} observables in batch {i//batch_size + 1}")
-                
-                for j, result in enumerate(results):
-                    if isinstance(result, Exception):
-                        logger.error(f"Error processing observable {i+j} for case {case['_id']}: {result}")
-                
-                # Small delay between batches
-                await asyncio.sleep(0.5)
+                try:
+                    await self.supabase.upsert_observables_bulk(case['_id'], case_uuid, batch)
+                    total_observables += len(batch)
+                    logger.info(f"Successfully processed {len(batch)} observables in batch {i//batch_size + 1}")
+                except Exception as e:
+                    logger.error(f"Error processing observable batch {i//batch_size + 1} for case {case['_id']}: {e}")
                 
             logger.info(f"Completed processing {total_observables} observables for case {case['_id']}")
             
@@ -193,26 +215,14 @@ class CaseProcessor:
             logger.error(f"Error processing observables for case {case['_id']}: {e}")
             raise
 
-    async def _process_single_observable(self, case_id: str, observable: Dict[str, Any]) -> None:
-        """Process a single observable with concurrency control.
-        
-        Args:
-            case_id: External case ID
-            observable: Observable data to process
-        """
-        async with self.semaphore:
-            # Get case UUID from Supabase
-            case_data = await self.supabase.client.table("cases").select("id").eq("case_id", case_id).execute()
-            if not case_data.data:
-                raise ValueError(f"Case {case_id} not found in Supabase")
-            case_uuid = case_data.data[0]["id"]
-            await self.supabase.upsert_observable_data(case_id, case_uuid, observable)
-
-    async def process_case_activities(self, case: Dict[str, Any]) -> None:
+    async def process_case_activities(self, case: Dict[str, Any], case_uuid: str) -> None:
         """Process all activities for a case.
         
+        All activities are stored with a single bulk upsert.
+        
         Args:
             case: The case data from the list_cases API
+            case_uuid: Supabase UUID of the case
         """
         try:
             logger.info(f"Fetching activities for case {case['_id']}")
@@ -221,13 +231,11 @@ class CaseProcessor:
             logger.info(f"Found {len(activities)} activities for case {case['_id']}")
             
             total_activities = 0
-            for activity in activities:
-                try:
-                    await self._process_single_activity(case['_id'], activity)
-                    total_activities += 1
-                except Exception as e:
-                    logger.error(f"Error processing activity for case {case['_id']}: {e}")
-                    continue
+            try:
+                await self.supabase.upsert_activities_bulk(case['_id'], case_uuid, activities)
+                total_activities = len(activities)
+            except Exception as e:
+                logger.error(f"Error storing activities for case {case['_id']}: {e}")
             
             logger.info(f"Processed {total_activities} activities for case {case['_id']}")
             
@@ -235,26 +243,12 @@ class CaseProcessor:
             logger.error(f"Error processing activities for case {case['_id']}: {e}")
             raise
 
-    async def _process_single_activity(self, case_id: str, activity: Dict[str, Any]) -> None:
-        """Process a single activity with concurrency control.
-        
-        Args:
-            case_id: External case ID
-            activity: Activity data to process
-        """
-        async with self.semaphore:
-            # Get case UUID from Supabase
-            case_data = await self.supabase.client.table("cases").select("id").eq("case_id", case_id).execute()
-            if not case_data.data:
-                raise ValueError(f"Case {case_id} not found in Supabase")
-            case_uuid = case_data.data[0]["id"]
-            await self.supabase.upsert_activity_data(case_id, case_uuid, activity)
-
 async def main():
     """Main entry point for the script."""
+    processor = None
     try:
         # Load environment variables
-        load_dotenv()
+        load_env()
         
         # Initialize auth and clients
         settings = load_settings()
@@ -281,7 +275,11 @@ async def main():
     except Exception as e:
         logger.error(f"Main process failed: {e}")
         raise
+    finally:
+        if processor is not None:
+            await processor.ai_agent.aclose()
 
 if __name__ == "__main__":
     logging.basicConfig(level=logging.INFO)
+    install_uvloop()
     asyncio.run(main())
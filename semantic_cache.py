@@ -0,0 +1,136 @@
+import os
+import json
+import logging
+from typing import Dict, Any, List, Optional, Sequence, Tuple
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+class SemanticCache:
+    """Cache of analysis results keyed by text embedding similarity.
+
+    Vectors are L2-normalized on insert so a dot product gives cosine
+    similarity; lookups are a single flat inner-product scan over all
+    cached vectors, which is fast enough for a few thousand cases.
+
+    Vectors are written in place into one float32 matrix used as a ring
+    buffer, so inserts and evictions never rebuild the matrix. Its
+    capacity doubles as needed up to max_entries.
+    """
+
+    INITIAL_CAPACITY = 256
+
+    def __init__(self, threshold: float = 0.95, max_entries: int = 10000, path: Optional[str] = None):
+        """Initialize the cache.
+
+        Args:
+            threshold: Minimum cosine similarity for a lookup to count as a hit
+            max_entries: Maximum number of cached entries; the oldest are evicted first
+            path: Optional .npz file used to persist the cache between runs
+        """
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self.path = path
+        self._matrix: Optional[np.ndarray] = None
+        self._payloads: List[Dict[str, Any]] = []
+        self._size = 0
+        self._next = 0  # Row written by the next add; the oldest row once full
+
+        if path and os.path.exists(path):
+            self.load()
+
+    def __len__(self) -> int:
+        return self._size
+
+    @staticmethod
+    def _normalize(vector: Sequence[float]) -> np.ndarray:
+        """Convert a vector to a unit-length float32 array."""
+        array = np.asarray(vector, dtype=np.float32)
+        norm = np.linalg.norm(array)
+        return array / norm if norm > 0 else array
+
+    def search(self, vector: Sequence[float]) -> Optional[Tuple[float, Dict[str, Any]]]:
+        """Find the most similar cached entry.
+
+        Args:
+            vector: Query embedding
+
+        Returns:
+            Optional[Tuple[float, Dict[str, Any]]]: Similarity score and payload of
+            the nearest entry, or None if the cache is empty
+        """
+        if not self._size:
+            return None
+        scores = self._matrix[:self._size] @ self._normalize(vector)
+        index = int(np.argmax(scores))
+        return float(scores[index]), self._payloads[index]
+
+    def lookup(self, vector: Sequence[float]) -> Optional[Dict[str, Any]]:
+        """Get the cached payload for a vector if a similar enough entry exists.
+
+        Args:
+            vector: Query embedding
+
+        Returns:
+            Optional[Dict[str, Any]]: Cached payload on a hit, None on a miss
+        """
+        hit = self.search(vector)
+        if hit and hit[0] >= self.threshold:
+            return hit[1]
+        return None
+
+    def add(self, vector: Sequence[float], payload: Dict[str, Any]) -> None:
+        """Insert an entry into the cache, evicting the oldest one when full.
+
+        Args:
+            vector: Embedding of the cached input
+            payload: JSON-serializable result to return on later hits
+        """
+        vector = self._normalize(vector)
+        if self._matrix is None:
+            self._matrix = np.empty((min(self.INITIAL_CAPACITY, self.max_entries), vector.shape[0]), dtype=np.float32)
+        elif self._next == len(self._matrix) < self.max_entries:
+            # Rows fill in order until the matrix is at max_entries, so
+            # growing only ever happens at the end
+            grown = np.empty((min(2 * len(self._matrix), self.max_entries), self._matrix.shape[1]), dtype=np.float32)
+            grown[:self._size] = self._matrix[:self._size]
+            self._matrix = grown
+        self._matrix[self._next] = vector
+        if self._next < len(self._payloads):
+            self._payloads[self._next] = payload
+        else:
+            self._payloads.append(payload)
+        self._size = min(self._size + 1, self.max_entries)
+        self._next = (self._next + 1) % self.max_entries
+
+    def _ordered_rows(self) -> np.ndarray:
+        """Row indices of the cached entries from oldest to newest."""
+        if self._size < self.max_entries:
+            return np.arange(self._size)
+        return (np.arange(self._size) + self._next) % self._size
+
+    def save(self) -> None:
+        """Persist the cache to its configured path."""
+        if not self.path:
+            raise ValueError("No cache path configured")
+        order = self._ordered_rows()
+        vectors = self._matrix[order] if self._size else np.empty((0, 0), dtype=np.float32)
+        payloads = [self._payloads[i] for i in order]
+        with open(self.path, "wb") as f:
+            np.savez(f, vectors=vectors, payloads=np.array(json.dumps(payloads)))
+        logger.info(f"Saved {len(self)} semantic cache entries to {self.path}")
+
+    def load(self) -> None:
+        """Load the cache from its configured path."""
+        if not self.path:
+            raise ValueError("No cache path configured")
+        with np.load(self.path) as data:
+            vectors = data["vectors"]
+            payloads = json.loads(str(data["payloads"]))
+        self._matrix = None
+        self._payloads = []
+        self._size = 0
+        self._next = 0
+        for vector, payload in zip(vectors[-self.max_entries:], payloads[-self.max_entries:]):
+            self.add(vector, payload)
+        logger.info(f"Loaded {len(self)} semantic cache entries from {self.path}")
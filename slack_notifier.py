@@ -1,6 +1,8 @@
 import os
+import asyncio
 import logging
 import smtplib
+import threading
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
 from typing import Dict, Any, List
@@ -8,10 +10,49 @@ from datetime import datetime
 
 logger = logging.getLogger(__name__)
 
+# Fixed leading sections of a high priority case notification
+CASE_MESSAGE_HEADER = (
+    "🚨 *High Priority Case Detected* 🚨\n\n"
+    "*Case Title:* {title}\n"
+    "*Status:* {status}\n"
+    "*Original Severity:* {severity}\n\n"
+    "*AI Analysis Results:*\n"
+    "- Severity Score: {severity_score}\n"
+    "- Priority Score: {priority_score}"
+)
+
 class SlackNotifier:
     def __init__(self):
         self.slack_email = "dev-ai-agent-aaaao3etab53lvdr2ehccrrfxa@stellarcyberteam.slack.com"
         self.sender_email = os.getenv("SENDER_EMAIL", "ai.agent@stellarcyber.ai")
+        # One SMTP connection is kept open and shared by all sends
+        self._smtp = None
+        self._smtp_lock = threading.Lock()
+        
+    def close(self) -> None:
+        """Close the SMTP connection, if one is open."""
+        with self._smtp_lock:
+            if self._smtp is not None:
+                try:
+                    self._smtp.quit()
+                except smtplib.SMTPException:
+                    self._smtp.close()
+                self._smtp = None
+    
+    def _send(self, msg: MIMEMultipart) -> None:
+        """Send a message over the shared SMTP connection.
+        
+        The connection is opened on first use and reopened once if the
+        server has dropped it since the last send.
+        """
+        with self._smtp_lock:
+            if self._smtp is None:
+                self._smtp = smtplib.SMTP('localhost')
+            try:
+                self._smtp.send_message(msg)
+            except smtplib.SMTPServerDisconnected:
+                self._smtp = smtplib.SMTP('localhost')
+                self._smtp.send_message(msg)
         
     def notify_high_priority_case(self, case_data: Dict[str, Any], analysis_data: Dict[str, Any]) -> None:
         """Send a notification to Slack for a high priority case."""
@@ -27,8 +68,7 @@ class SlackNotifier:
             msg.attach(MIMEText(body, 'plain'))
             
             # Send email to Slack
-            with smtplib.SMTP('localhost') as server:
-                server.send_message(msg)
+            self._send(msg)
             
             logger.info(f"Successfully sent Slack notification for case {case_data.get('external_id')}")
             
@@ -49,8 +89,8 @@ class SlackNotifier:
             msg.attach(MIMEText(message, 'plain'))
             
             # Send email to Slack
-            with smtplib.SMTP('localhost') as server:
-                server.send_message(msg)
+            # smtplib blocks, so send from a worker thread
+            await asyncio.to_thread(self._send, msg)
             
             logger.info("Successfully sent Slack message")
             
@@ -61,47 +101,32 @@ class SlackNotifier:
             
     def _create_message_body(self, case_data: Dict[str, Any], analysis_data: Dict[str, Any]) -> str:
         """Create a formatted message body for the Slack notification."""
-        body = []
-        
-        # Case details
-        body.append("🚨 *High Priority Case Detected* 🚨")
-        body.append("")
-        body.append(f"*Case Title:* {case_data.get('title')}")
-        body.append(f"*Status:* {case_data.get('status')}")
-        body.append(f"*Original Severity:* {case_data.get('severity')}")
-        body.append("")
+        sections = [
+            CASE_MESSAGE_HEADER.format(
+                title=case_data.get('title'),
+                status=case_data.get('status'),
+                severity=case_data.get('severity'),
+                severity_score=analysis_data.get('severity_score'),
+                priority_score=analysis_data.get('priority_score')
+            ),
+            self._bulleted("*Key Indicators:*", analysis_data.get('key_indicators', []))
+        ]
         
-        # AI Analysis
-        body.append("*AI Analysis Results:*")
-        body.append(f"- Severity Score: {analysis_data.get('severity_score')}")
-        body.append(f"- Priority Score: {analysis_data.get('priority_score')}")
-        body.append("")
+        patterns = analysis_data.get('patterns')
+        if patterns:
+            sections.append(self._bulleted("*Patterns Identified:*", patterns))
         
-        # Key Indicators
-        body.append("*Key Indicators:*")
-        for indicator in analysis_data.get('key_indicators', []):
-            body.append(f"- {indicator}")
-        body.append("")
-        
-        # Patterns
-        if analysis_data.get('patterns'):
-            body.append("*Patterns Identified:*")
-            for pattern in analysis_data.get('patterns', []):
-                body.append(f"- {pattern}")
-            body.append("")
-        
-        # Recommended Actions
-        body.append("*Recommended Actions:*")
-        for action in analysis_data.get('recommended_actions', []):
-            body.append(f"- {action}")
-        body.append("")
+        sections.append(self._bulleted("*Recommended Actions:*", analysis_data.get('recommended_actions', [])))
         
         # Case Link (if available)
-        if case_data.get('url'):
-            body.append(f"*Case Link:* {case_data.get('url')}")
-        
-        # Timestamp
-        body.append("")
-        body.append(f"_Notification sent at {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}_")
+        url = case_data.get('url')
+        if url:
+            sections.append(f"*Case Link:* {url}")
         
-        return "\n".join(body)
+        sections.append(f"_Notification sent at {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}_")
+        return "\n\n".join(sections)
+    
+    @staticmethod
+    def _bulleted(header: str, items: List[Any]) -> str:
+        """Format a section header followed by one bullet per item."""
+        return header + "".join(f"\n- {item}" for item in items)
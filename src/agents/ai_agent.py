@@ -1,12 +1,18 @@
 """AI agent for analyzing security cases."""
 import os
 import logging
+from functools import cached_property, lru_cache
 from openai import AsyncOpenAI
 from typing import Dict, Any, List
 from datetime import datetime
 
 logger = logging.getLogger(__name__)
 
+@lru_cache(maxsize=1024)
+def _format_timestamp(epoch_ms: int) -> str:
+    """Format an epoch timestamp in milliseconds as a local ISO 8601 string."""
+    return datetime.fromtimestamp(epoch_ms / 1000).isoformat()
+
 class AIAgent:
     """AI agent for analyzing security cases using GPT-4."""
 
@@ -22,6 +28,17 @@ class AIAgent:
                     4. Recommended automated and manual actions
                     Be specific and concise."""
 
+    @cached_property
+    def _client(self) -> AsyncOpenAI:
+        """OpenAI client shared by all analyses, created on first use."""
+        return AsyncOpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+
+    async def aclose(self) -> None:
+        """Close the OpenAI client and its connection pool, if one was created."""
+        client = self.__dict__.pop("_client", None)
+        if client is not None:
+            await client.close()
+
     async def analyze_case(self, case_id: str, case_data: Dict[str, Any]) -> Dict[str, Any]:
         """Analyze a case using AI.
 
@@ -37,16 +54,15 @@ class AIAgent:
         
         try:
             # Get completion from OpenAI
-            async with AsyncOpenAI(api_key=os.getenv("OPENAI_API_KEY")) as client:
-                completion = await client.chat.completions.create(
-                    model=self.model,
-                    messages=[
-                        {"role": "system", "content": self.system_prompt},
-                        {"role": "user", "content": prompt}
-                    ],
-                    temperature=0.7,
-                    max_tokens=1000
-                )
+            completion = await self._client.chat.completions.create(
+                model=self.model,
+                messages=[
+                    {"role": "system", "content": self.system_prompt},
+                    {"role": "user", "content": prompt}
+                ],
+                temperature=0.7,
+                max_tokens=1000
+            )
             
             # Extract the completion text
             completion_text = completion.choices[0].message.content
@@ -75,7 +91,7 @@ class AIAgent:
         Score: {case_data.get('score')}
         Status: {case_data.get('status')}
         Size: {case_data.get('size')}
-        Created At: {datetime.fromtimestamp(case_data.get('created_at', 0)/1000).isoformat()}
+        Created At: {_format_timestamp(case_data.get('created_at', 0))}
         
         Provide a structured analysis of the case focusing on:
         1. Risk level (0-10)
@@ -86,47 +102,46 @@ class AIAgent:
     def _parse_completion(self, completion_text: str) -> Dict[str, Any]:
         """Parse AI completion into structured data."""
         try:
-            # Extract risk level (assuming it's mentioned in the format "Risk level: X" or similar)
             risk_level = 5  # Default medium risk
-            for line in completion_text.split('\n'):
-                if 'risk level' in line.lower():
+            risk_factors = []
+            recommendations = []
+            risk_section = False
+            action_section = False
+
+            # Single pass over the lines; the risk factor and action sections
+            # are tracked independently since one header may open both
+            for line in completion_text.splitlines():
+                lower = line.lower()
+                stripped = line.strip()
+                is_item = stripped.startswith('-')
+
+                # Risk level is mentioned as "Risk level: X" or similar
+                if 'risk level' in lower:
                     try:
                         risk_level = int(float(line.split(':')[1].strip().split()[0]))
                     except (ValueError, IndexError):
                         pass
 
-            # Determine if human investigation is needed
-            needs_human = (
-                'human' in completion_text.lower() and 
-                ('needed' in completion_text.lower() or 'required' in completion_text.lower())
-            )
-
-            # Extract risk factors
-            risk_factors = []
-            risk_section = False
-            for line in completion_text.split('\n'):
-                if 'risk factor' in line.lower():
+                if 'risk factor' in lower:
                     risk_section = True
-                elif risk_section and line.strip().startswith('-'):
-                    risk_factors.append(line.strip()[1:].strip())
-                elif risk_section and line.strip() and not line.strip().startswith('-'):
+                elif risk_section and is_item:
+                    risk_factors.append(stripped[1:].strip())
+                elif risk_section and stripped:
                     risk_section = False
 
-            # Extract recommended actions
-            recommendations = []
-            action_section = False
-            for line in completion_text.split('\n'):
-                if 'recommend' in line.lower() or 'action' in line.lower():
+                if 'recommend' in lower or 'action' in lower:
                     action_section = True
-                elif action_section and line.strip().startswith('-'):
-                    action = line.strip()[1:].strip()
-                    if 'automat' in action.lower():
-                        recommendations.append(f"auto_{action.split()[-1].lower()}")
-                    else:
-                        recommendations.append(f"manual_{action.split()[-1].lower()}")
-                elif action_section and line.strip() and not line.strip().startswith('-'):
+                elif action_section and is_item:
+                    action = stripped[1:].strip()
+                    prefix = "auto" if 'automat' in lower else "manual"
+                    recommendations.append(f"{prefix}_{action.split()[-1].lower()}")
+                elif action_section and stripped:
                     action_section = False
 
+            # Determine if human investigation is needed
+            text = completion_text.lower()
+            needs_human = 'human' in text and ('needed' in text or 'required' in text)
+
             return {
                 "risk_level": risk_level,
                 "needs_human": needs_human,
@@ -2,7 +2,6 @@
 import logging
 from datetime import datetime
 from typing import Dict, Any, List, Optional
-import aiohttp
 from urllib.parse import urlparse
 
 from src.clients.auth import AuthManager
@@ -21,20 +20,25 @@ class APIClient:
         self.hostname = urlparse(self.settings.ENVIRONMENT_URL).netloc
         self.retry_config = RetryConfig(max_retries=3, initial_delay=1.0)
 
+    async def close(self) -> None:
+        """Close the HTTP session shared with the auth manager."""
+        await self.auth_manager.close()
+
     async def _make_request(self, method: str, path: str, **kwargs) -> Any:
-        """Make an authenticated request to the API."""
+        """Make an authenticated request to the API over the shared session."""
         headers = await self.auth_manager.get_auth_headers()
         if 'headers' in kwargs:
             headers.update(kwargs['headers'])
         kwargs['headers'] = headers
 
         url = f"https://{self.hostname}/connect/api/v1{path}"
-        async with aiohttp.ClientSession() as session:
-            async with session.request(method, url, **kwargs) as response:
-                response.raise_for_status()
-                data = await response.json()
-                logger.info(f"API response from {path}: {data}")
-                return data
+        async with self.auth_manager.session.request(method, url, **kwargs) as response:
+            response.raise_for_status()
+            data = await response.json()
+            # Responses can be large; only build their repr when debugging
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("API response from %s: %s", path, data)
+            return data
 
     async def get_case_details(self, case_id: str) -> Dict[str, Any]:
         """Get details for a specific case."""
@@ -113,12 +117,12 @@ class APIClient:
             
             # Send the update request
             url = f"https://{self.hostname}/connect/api/v1/cases/{case_id}/update"
-            async with aiohttp.ClientSession() as session:
-                async with session.put(url, json=api_updates, headers=await self.auth_manager.get_auth_headers()) as response:
-                    if response.status != 200:
-                        raise Exception(f"{response.status}, message='{response.reason}', url='{url}'")
-                    
-                    logger.info(f"Successfully updated case {case_id} status")
+            headers = await self.auth_manager.get_auth_headers()
+            async with self.auth_manager.session.put(url, json=api_updates, headers=headers) as response:
+                if response.status != 200:
+                    raise Exception(f"{response.status}, message='{response.reason}', url='{url}'")
+                
+                logger.info(f"Successfully updated case {case_id} status")
                     
         except Exception as e:
             logger.error(f"Error updating case {case_id} status: {e}")
@@ -1,36 +1,160 @@
 """Authentication manager for API clients."""
+import asyncio
 import logging
-from datetime import datetime, timedelta
+import os
+import ssl
+import tempfile
+import time
 from typing import Dict, Any, Optional
 import aiohttp
 import base64
+import json
 from urllib.parse import urlparse
+from tenacity import AsyncRetrying, RetryCallState, retry_if_exception, stop_after_attempt, wait_random_exponential
 
 from src.config.settings import load_settings
 
 logger = logging.getLogger(__name__)
 
+# Built once and shared by every pooled connection so TLS sessions can resume
+SSL_CONTEXT = ssl.create_default_context()
+
+# Token endpoint responses worth retrying
+RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+
+# Jittered backoff keeps agents from retrying in lockstep after an IdP outage
+_backoff = wait_random_exponential(multiplier=0.5, max=30)
+
+def _is_retryable(exc: BaseException) -> bool:
+    """Check whether a failed token request is worth retrying."""
+    if isinstance(exc, aiohttp.ClientResponseError):
+        return exc.status in RETRY_STATUSES
+    return isinstance(exc, (aiohttp.ClientConnectionError, asyncio.TimeoutError))
+
+def _token_retry_wait(retry_state: RetryCallState) -> float:
+    """Wait for the server's Retry-After if given, otherwise back off with jitter."""
+    exc = retry_state.outcome.exception()
+    retry_after = getattr(exc, "headers", None) and exc.headers.get("Retry-After")
+    if retry_after:
+        try:
+            return min(float(retry_after), 60.0)
+        except ValueError:
+            pass
+    return _backoff(retry_state)
+
 class AuthManager:
     """Manages authentication tokens and session state."""
 
-    def __init__(self) -> None:
-        """Initialize the auth manager."""
+    # Refresh this many seconds before expiry so requests never carry a stale token
+    TOKEN_REFRESH_SKEW_SECONDS = 60
+    
+    # Lifetime assumed when the token response does not include one
+    DEFAULT_TOKEN_LIFETIME_SECONDS = 3600
+
+    # Access tokens are cached here so restarts and sibling processes reuse them
+    DEFAULT_TOKEN_CACHE_PATH = os.path.join("~", ".cache", "soc", "token.json")
+
+    # Connection pool shared by token refreshes and API requests
+    POOL_SIZE = 32
+    CONNECT_TIMEOUT = 3.05
+    REQUEST_TIMEOUT = 30
+
+    def __init__(self, token_cache_path: Optional[str] = DEFAULT_TOKEN_CACHE_PATH) -> None:
+        """Initialize the auth manager.
+
+        Args:
+            token_cache_path: JSON file used to persist the access token
+                between runs, or None to keep it in memory only
+        """
         self.settings = load_settings()
         self.access_token = None
         self.refresh_token = self.settings.REFRESH_TOKEN
-        self.token_expiry = None
+        self._expiry_epoch = 0.0
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._refresh_lock = asyncio.Lock()
+        self.token_cache_path = os.path.expanduser(token_cache_path) if token_cache_path else None
+        self._load_stored_token()
+
+    def _load_stored_token(self) -> None:
+        """Load a previously persisted access token if one exists."""
+        if not self.token_cache_path:
+            return
+        try:
+            with open(self.token_cache_path, encoding="utf-8") as f:
+                stored = json.load(f)
+            self.access_token = stored['access_token']
+            self._expiry_epoch = float(stored['exp'])
+        except FileNotFoundError:
+            return
+        except (OSError, KeyError, TypeError, ValueError) as e:
+            logger.warning("Ignoring unreadable token cache %s: %s", self.token_cache_path, e)
+
+    def _save_token(self) -> None:
+        """Persist the access token atomically, readable only by the owner."""
+        if not self.token_cache_path:
+            return
+        directory = os.path.dirname(self.token_cache_path)
+        try:
+            os.makedirs(directory, mode=0o700, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".token-")
+            try:
+                with os.fdopen(fd, "w", encoding="utf-8") as f:
+                    json.dump({'access_token': self.access_token, 'exp': self._expiry_epoch}, f)
+                os.replace(tmp_path, self.token_cache_path)
+            except BaseException:
+                os.unlink(tmp_path)
+                raise
+        except OSError as e:
+            logger.warning("Failed to persist access token: %s", e)
+
+    @property
+    def session(self) -> aiohttp.ClientSession:
+        """Get the pooled HTTP session, creating it on first use.
+
+        The session keeps connections alive between requests, so repeated
+        calls to the API host skip the TCP and TLS handshakes.
+        """
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(
+                    limit=self.POOL_SIZE,
+                    limit_per_host=self.POOL_SIZE,
+                    ssl=SSL_CONTEXT
+                ),
+                timeout=aiohttp.ClientTimeout(
+                    total=self.REQUEST_TIMEOUT,
+                    connect=self.CONNECT_TIMEOUT
+                )
+            )
+        return self._session
+
+    async def close(self) -> None:
+        """Close the pooled HTTP session."""
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
 
     async def get_access_token(self) -> str:
-        """Get a valid access token, refreshing if necessary."""
+        """Get a valid access token, refreshing if necessary.
+
+        Concurrent callers that find the token expired wait on a single
+        refresh instead of each requesting a new token.
+        """
         if not self.access_token or self.is_token_expired():
-            await self.refresh_tokens()
+            async with self._refresh_lock:
+                if not self.access_token or self.is_token_expired():
+                    await self.refresh_tokens()
         return self.access_token
 
-    def is_token_expired(self) -> bool:
-        """Check if the current access token is expired."""
-        if not self.token_expiry:
-            return True
-        return datetime.utcnow() >= self.token_expiry
+    def is_token_expired(self, skew: Optional[float] = None) -> bool:
+        """Check if the current access token is expired or about to expire.
+
+        Args:
+            skew: Seconds before the actual expiry at which the token is
+                treated as expired; defaults to TOKEN_REFRESH_SKEW_SECONDS
+        """
+        if skew is None:
+            skew = self.TOKEN_REFRESH_SKEW_SECONDS
+        return self._expiry_epoch - time.time() < skew
 
     async def refresh_tokens(self) -> None:
         """Refresh the access and refresh tokens."""
@@ -42,21 +166,54 @@ class AuthManager:
             f"{self.settings.STELLAR_USERNAME}:{self.refresh_token}".encode()
         ).decode()
         
-        async with aiohttp.ClientSession() as session:
-            url = f"https://{hostname}/connect/api/v1/access_token"
-            headers = {
-                "Authorization": f"Basic {auth}",
-                "Content-Type": "application/x-www-form-urlencoded",
-                "Accept": "application/json"
-            }
-            async with session.post(url, headers=headers) as response:
-                response.raise_for_status()
-                data = await response.json()
-                
-                # Update tokens
-                self.access_token = data['access_token']
-                # Set expiry to 1 hour from now
-                self.token_expiry = datetime.utcnow() + timedelta(hours=1)
+        url = f"https://{hostname}/connect/api/v1/access_token"
+        headers = {
+            "Authorization": f"Basic {auth}",
+            "Content-Type": "application/x-www-form-urlencoded",
+            "Accept": "application/json"
+        }
+        # Transient IdP failures are retried here so a polling cycle is not lost
+        async for attempt in AsyncRetrying(
+            retry=retry_if_exception(_is_retryable),
+            wait=_token_retry_wait,
+            stop=stop_after_attempt(self.settings.MAX_RETRIES + 1),
+            reraise=True
+        ):
+            with attempt:
+                async with self.session.post(url, headers=headers) as response:
+                    response.raise_for_status()
+                    data = await response.json()
+        
+        # Update tokens
+        self.access_token = data['access_token']
+        # Expiry is kept as epoch seconds so checks are a float compare
+        if 'expires_in' in data:
+            self._expiry_epoch = time.time() + float(data['expires_in'])
+        else:
+            self._expiry_epoch = self._token_expiry_epoch(self.access_token)
+        
+        self._save_token()
+
+    def _token_expiry_epoch(self, token: str) -> float:
+        """Read the expiry of a JWT access token.
+
+        Only the payload segment is decoded; the signature is not checked
+        since the token came straight from the token endpoint. Falls back to
+        DEFAULT_TOKEN_LIFETIME_SECONDS if the token has no readable exp claim.
+
+        Args:
+            token: JWT access token
+
+        Returns:
+            float: Expiry as epoch seconds
+        """
+        try:
+            payload = token.split('.', 2)[1]
+            payload += '=' * (-len(payload) % 4)
+            return float(json.loads(base64.urlsafe_b64decode(payload))['exp'])
+        except (IndexError, KeyError, TypeError, ValueError) as e:
+            logger.warning("Could not read access token expiry: %s", e)
+            return time.time() + self.DEFAULT_TOKEN_LIFETIME_SECONDS
 
     async def get_auth_headers(self) -> Dict[str, str]:
         """Get headers for authenticated requests."""
@@ -1,7 +1,7 @@
 """Client for interacting with Supabase."""
 import logging
-from typing import Dict, Any, Optional
-from uuid import uuid4
+import random
+from typing import Dict, Any, List, Optional, Union
 from datetime import datetime
 import asyncio
 
@@ -13,6 +13,9 @@ logger = logging.getLogger(__name__)
 class SupabaseClient:
     """Client for interacting with Supabase."""
 
+    # Alerts, observables and activities are matched on their API ID within a case
+    CASE_ROW_KEY = 'case_id,external_id'
+
     def __init__(self) -> None:
         """Initialize the Supabase client."""
         self.settings = load_settings()
@@ -23,13 +26,19 @@ class SupabaseClient:
         self.logger = logging.getLogger(__name__)
         self.timeout = 10  # Set timeout to 10 seconds
 
-    async def _execute_with_timeout(self, table: str, operation: str, data: Dict[str, Any], unique_key: Optional[str] = None) -> Any:
+    async def _execute_with_timeout(
+        self,
+        table: str,
+        operation: str,
+        data: Union[Dict[str, Any], List[Dict[str, Any]]],
+        unique_key: Optional[str] = None
+    ) -> Any:
         """Execute a Supabase operation with timeout and retry logic.
         
         Args:
             table: Name of the table
             operation: Operation type ('upsert' or 'select')
-            data: Data to upsert or query parameters
+            data: Row or list of rows to upsert, or query parameters
             unique_key: Optional column name to use for upsert conflict resolution
             
         Returns:
@@ -50,14 +59,8 @@ class SupabaseClient:
                 query = self.client.table(table)
                 if operation == 'upsert':
                     if unique_key:
-                        # First check if record exists
-                        existing = query.select("id").eq(unique_key, data.get(unique_key)).execute()
-                        if existing.data:
-                            # Update existing record
-                            query = query.update(data).eq(unique_key, data.get(unique_key))
-                        else:
-                            # Insert new record
-                            query = query.insert(data)
+                        # Resolve conflicts on the unique key server-side
+                        query = query.upsert(data, on_conflict=unique_key)
                     else:
                         query = query.insert(data)
                 elif operation == 'select':
@@ -65,7 +68,7 @@ class SupabaseClient:
                 
                 # Execute with timeout
                 result = await asyncio.wait_for(
-                    asyncio.to_thread(lambda: query.execute()),
+                    asyncio.to_thread(query.execute),
                     timeout=self.timeout
                 )
                 
@@ -74,8 +77,10 @@ class SupabaseClient:
 
             except (asyncio.TimeoutError, Exception) as e:
                 if "Server disconnected" in str(e) and attempt < max_retries - 1:
-                    self.logger.warning(f"Server disconnected during {operation} operation on table {table}. Retrying in {retry_delay} seconds...")
-                    await asyncio.sleep(retry_delay)
+                    # Jitter spreads out clients that were disconnected together
+                    delay = retry_delay * random.uniform(0.5, 1.5)
+                    self.logger.warning(f"Server disconnected during {operation} operation on table {table}. Retrying in {delay:.1f} seconds...")
+                    await asyncio.sleep(delay)
                     retry_delay *= 2  # Exponential backoff
                     continue
                     
@@ -113,9 +118,6 @@ class SupabaseClient:
         """
         self.logger.info(f"Upserting case data: {case_id}")
         try:
-            # Check if case exists
-            case_uuid = await self._get_case_uuid(case_id)
-
             # Create timestamps
             created_at = None
             if case_data.get('created_at'):
@@ -155,25 +157,14 @@ class SupabaseClient:
                 }
             }
 
-            if case_uuid:
-                # Update existing case
-                data['id'] = case_uuid  # Keep the same ID
-                
-                # Update without affecting foreign key relationships
-                query = self.client.table('cases').update(data).eq('id', case_uuid)
-                await asyncio.wait_for(
-                    asyncio.to_thread(lambda: query.execute()),
-                    timeout=self.timeout
-                )
-            else:
-                # Insert new case
-                case_uuid = str(uuid4())
-                data['id'] = case_uuid
-                query = self.client.table('cases').insert(data)
-                await asyncio.wait_for(
-                    asyncio.to_thread(lambda: query.execute()),
-                    timeout=self.timeout
-                )
+            # Insert or update in one round trip; an existing case keeps its
+            # id, so foreign key relationships are unaffected
+            query = self.client.table('cases').upsert(data, on_conflict='external_id')
+            result = await asyncio.wait_for(
+                asyncio.to_thread(query.execute),
+                timeout=self.timeout
+            )
+            case_uuid = result.data[0]['id']
 
             self.logger.info(f"Successfully upserted case: {case_id}")
             return case_uuid
@@ -191,31 +182,58 @@ class SupabaseClient:
             alert_data: Alert data from API
         """
         try:
-            # Create the data structure that matches our schema
-            created_at = None
-            if alert_data.get('created_at'):
-                dt = datetime.fromtimestamp(alert_data.get('created_at', 0) / 1000)
-                created_at = dt.isoformat()
-
-            data = {
-                'id': str(uuid4()),
-                'case_id': case_uuid,  # Foreign key to cases table
-                'type': alert_data.get('type'),
-                'severity': alert_data.get('severity'),
-                'created_at': created_at,
-                'metadata': alert_data
-            }
+            data = self._alert_row(case_uuid, alert_data)
             
             # Log the data being upserted
             self.logger.info(f"Upserting alert data for case: {case_id}")
             
             # Upsert to Supabase with timeout
-            await self._execute_with_timeout('alerts', 'upsert', data, unique_key='id')
+            await self._execute_with_timeout('alerts', 'upsert', data, unique_key=self.CASE_ROW_KEY)
+
+        except Exception as e:
+            self.logger.error(f"Error upserting alert data: {e}")
+            raise
+
+    async def upsert_alerts_bulk(self, case_id: str, case_uuid: str, alerts: List[Dict[str, Any]]) -> None:
+        """Upsert a batch of alerts to Supabase in one request.
+        
+        Rows are matched on their API ID within the case, so reprocessing a
+        case updates its alerts instead of duplicating them.
+        
+        Args:
+            case_id: External case ID
+            case_uuid: Supabase case UUID
+            alerts: Alert data from API
+        """
+        if not alerts:
+            return
+        try:
+            rows = [self._alert_row(case_uuid, alert) for alert in alerts]
+            self.logger.info(f"Upserting {len(rows)} alerts for case: {case_id}")
+            await self._execute_with_timeout('alerts', 'upsert', rows, unique_key=self.CASE_ROW_KEY)
 
         except Exception as e:
             self.logger.error(f"Error upserting alert data: {e}")
             raise
 
+    @staticmethod
+    def _alert_row(case_uuid: str, alert_data: Dict[str, Any]) -> Dict[str, Any]:
+        """Build the alerts table row for an alert from the API."""
+        # Create the data structure that matches our schema
+        created_at = None
+        if alert_data.get('created_at'):
+            dt = datetime.fromtimestamp(alert_data.get('created_at', 0) / 1000)
+            created_at = dt.isoformat()
+
+        return {
+            'external_id': alert_data.get('_id'),
+            'case_id': case_uuid,  # Foreign key to cases table
+            'type': alert_data.get('type'),
+            'severity': alert_data.get('severity'),
+            'created_at': created_at,
+            'metadata': alert_data
+        }
+
     async def upsert_activity_data(self, case_id: str, case_uuid: str, activity_data: Dict[str, Any]) -> None:
         """Upsert activity data to Supabase.
         
@@ -225,33 +243,59 @@ class SupabaseClient:
             activity_data: Activity data from API
         """
         try:
-            # Create analysis result data
-            created_at = None
-            if activity_data.get('timestamp'):
-                dt = datetime.fromtimestamp(activity_data.get('timestamp', 0) / 1000)
-                created_at = dt.isoformat()
-
-            data = {
-                'id': str(uuid4()),
-                'case_id': case_uuid,  # Foreign key to cases table
-                'severity_score': self._calculate_severity_score(activity_data),
-                'priority_score': self._calculate_priority_score(activity_data),
-                'key_indicators': self._extract_key_indicators(activity_data),
-                'patterns': self._extract_patterns(activity_data),
-                'created_at': created_at,
-                'metadata': activity_data
-            }
+            data = self._activity_row(case_uuid, activity_data)
             
             # Log the data being upserted
             self.logger.info(f"Upserting activity data for case: {case_id}")
             
             # Upsert to Supabase with timeout
-            await self._execute_with_timeout('activities', 'upsert', data, unique_key='id')
+            await self._execute_with_timeout('activities', 'upsert', data, unique_key=self.CASE_ROW_KEY)
+
+        except Exception as e:
+            self.logger.error(f"Error upserting activity data: {e}")
+            raise
+
+    async def upsert_activities_bulk(self, case_id: str, case_uuid: str, activities: List[Dict[str, Any]]) -> None:
+        """Upsert a batch of activities to Supabase in one request.
+        
+        Rows are matched on their API ID within the case, so reprocessing a
+        case updates its activities instead of duplicating them.
+        
+        Args:
+            case_id: External case ID
+            case_uuid: Supabase case UUID
+            activities: Activity data from API
+        """
+        if not activities:
+            return
+        try:
+            rows = [self._activity_row(case_uuid, activity) for activity in activities]
+            self.logger.info(f"Upserting {len(rows)} activities for case: {case_id}")
+            await self._execute_with_timeout('activities', 'upsert', rows, unique_key=self.CASE_ROW_KEY)
 
         except Exception as e:
             self.logger.error(f"Error upserting activity data: {e}")
             raise
 
+    def _activity_row(self, case_uuid: str, activity_data: Dict[str, Any]) -> Dict[str, Any]:
+        """Build the activities table row for an activity from the API."""
+        # Create analysis result data
+        created_at = None
+        if activity_data.get('timestamp'):
+            dt = datetime.fromtimestamp(activity_data.get('timestamp', 0) / 1000)
+            created_at = dt.isoformat()
+
+        return {
+            'external_id': activity_data.get('_id'),
+            'case_id': case_uuid,  # Foreign key to cases table
+            'severity_score': self._calculate_severity_score(activity_data),
+            'priority_score': self._calculate_priority_score(activity_data),
+            'key_indicators': self._extract_key_indicators(activity_data),
+            'patterns': self._extract_patterns(activity_data),
+            'created_at': created_at,
+            'metadata': activity_data
+        }
+
     async def upsert_decision_metrics(self, metrics: Dict[str, Any]) -> Dict[str, Any]:
         """Upsert decision metrics into the database.
 
@@ -303,35 +347,62 @@ class SupabaseClient:
             observable_data: Observable data from API
         """
         try:
-            # Create the data structure that matches our schema
-            created_at = None
-            if observable_data.get('created_at'):
-                dt = datetime.fromtimestamp(observable_data.get('created_at', 0) / 1000)
-                created_at = dt.isoformat()
-
-            data = {
-                'id': str(uuid4()),
-                'case_id': case_uuid,  # Foreign key to cases table
-                'type': observable_data.get('type'),
-                'value': observable_data.get('value'),
-                'created_at': created_at,
-                'metadata': {
-                    'source': observable_data.get('source'),
-                    'reputation': observable_data.get('reputation', 'unknown'),
-                    'tags': observable_data.get('tags', [])
-                }
-            }
+            data = self._observable_row(case_uuid, observable_data)
             
             # Log the data being upserted
             self.logger.info(f"Upserting observable data for case: {case_id}")
             
             # Upsert to Supabase with timeout
-            await self._execute_with_timeout('observables', 'upsert', data)
+            await self._execute_with_timeout('observables', 'upsert', data, unique_key=self.CASE_ROW_KEY)
 
         except Exception as e:
             self.logger.error(f"Error upserting observable data: {e}")
             raise
 
+    async def upsert_observables_bulk(self, case_id: str, case_uuid: str, observables: List[Dict[str, Any]]) -> None:
+        """Upsert a batch of observables to Supabase in one request.
+        
+        Rows are matched on their API ID within the case, so reprocessing a
+        case updates its observables instead of duplicating them.
+        
+        Args:
+            case_id: External case ID
+            case_uuid: Supabase case UUID
+            observables: Observable data from API
+        """
+        if not observables:
+            return
+        try:
+            rows = [self._observable_row(case_uuid, observable) for observable in observables]
+            self.logger.info(f"Upserting {len(rows)} observables for case: {case_id}")
+            await self._execute_with_timeout('observables', 'upsert', rows, unique_key=self.CASE_ROW_KEY)
+
+        except Exception as e:
+            self.logger.error(f"Error upserting observable data: {e}")
+            raise
+
+    @staticmethod
+    def _observable_row(case_uuid: str, observable_data: Dict[str, Any]) -> Dict[str, Any]:
+        """Build the observables table row for an observable from the API."""
+        # Create the data structure that matches our schema
+        created_at = None
+        if observable_data.get('created_at'):
+            dt = datetime.fromtimestamp(observable_data.get('created_at', 0) / 1000)
+            created_at = dt.isoformat()
+
+        return {
+            'external_id': observable_data.get('_id'),
+            'case_id': case_uuid,  # Foreign key to cases table
+            'type': observable_data.get('type'),
+            'value': observable_data.get('value'),
+            'created_at': created_at,
+            'metadata': {
+                'source': observable_data.get('source'),
+                'reputation': observable_data.get('reputation', 'unknown'),
+                'tags': observable_data.get('tags', [])
+            }
+        }
+
     async def update(self, table: str, data: Dict[str, Any], match_column: str, match_value: Any) -> None:
         """Update records in a table.
         
@@ -5,6 +5,7 @@ from typing import Dict, Any, Optional
 from pathlib import Path
 import os
 from functools import lru_cache
+from dataclasses import make_dataclass
 from pydantic_settings import BaseSettings, SettingsConfigDict
 from pydantic import Field
 
@@ -68,3 +69,28 @@ def get_settings() -> Settings:
 def get_test_settings() -> Settings:
     """Get test settings instance"""
     return Settings.get_test_settings()
+
+def freeze_settings(settings: Settings) -> Any:
+    """
+    Snapshot validated settings into a frozen, slotted dataclass
+    
+    Extra fields loaded from the environment (e.g. ENVIRONMENT_URL) are
+    included, so the snapshot exposes the same attributes as the settings.
+    
+    Args:
+        settings: Validated settings instance
+        
+    Returns:
+        Any: Immutable settings object with slot-based attribute reads
+    """
+    values = {
+        name: value for name, value in settings.model_dump().items()
+        if name.isidentifier()
+    }
+    frozen_cls = make_dataclass("FrozenSettings", list(values), frozen=True, slots=True)
+    return frozen_cls(**values)
+
+@lru_cache()
+def load_settings() -> Any:
+    """Get the cached, frozen settings snapshot used by the clients"""
+    return freeze_settings(get_settings())
@@ -0,0 +1,20 @@
+"""
+One-shot loading of the .env file.
+"""
+from functools import lru_cache
+
+from dotenv import load_dotenv
+
+@lru_cache(maxsize=1)
+def load_env() -> bool:
+    """
+    Load the .env file into the process environment once
+
+    Every module that reads configuration from os.environ calls this
+    instead of load_dotenv(), so the file is parsed a single time per
+    process no matter how many clients are created.
+
+    Returns:
+        bool: True if a .env file was found and loaded
+    """
+    return load_dotenv()
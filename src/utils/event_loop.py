@@ -0,0 +1,48 @@
+"""
+Event loop setup for the async entry points.
+"""
+import asyncio
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+def install_uvloop() -> bool:
+    """
+    Use uvloop as the asyncio event loop policy when it is available
+
+    uvloop handles socket-heavy workloads (OpenAI and API fan-out) faster
+    than the default selector loop. It is not available on Windows, where
+    the default loop is kept.
+
+    Returns:
+        bool: True if uvloop was installed
+    """
+    try:
+        import uvloop
+    except ImportError:
+        logger.debug("uvloop not available, using the default event loop")
+        return False
+
+    asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
+    logger.debug("Using uvloop event loop")
+    return True
+
+async def monitor_loop_lag(interval: float = 1.0, threshold: float = 0.1) -> None:
+    """
+    Log a warning whenever the event loop falls behind schedule
+
+    Sleeps for interval seconds at a time and measures how late each wakeup
+    is. A late wakeup means some callback or coroutine blocked the loop
+    instead of awaiting, which stalls every other task.
+
+    Args:
+        interval: Seconds between measurements
+        threshold: Lag in seconds above which a warning is logged
+    """
+    while True:
+        start = time.monotonic()
+        await asyncio.sleep(interval)
+        lag = time.monotonic() - start - interval
+        if lag > threshold:
+            logger.warning("Event loop lagged by %.3f seconds", lag)
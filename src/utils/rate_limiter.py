@@ -3,6 +3,7 @@ Rate limiting utilities for API requests and agent operations.
 """
 from datetime import datetime
 import asyncio
+import time
 from typing import List
 
 class RateLimiter:
@@ -41,3 +42,41 @@ class RateLimiter:
                 
             self.timestamps.append(now)
             return True
+
+
+class TokenBucket:
+    """Token bucket that waits for capacity instead of rejecting calls"""
+    
+    def __init__(self, rate_per_sec: float, burst: int):
+        """
+        Initialize token bucket
+        
+        Args:
+            rate_per_sec: Tokens added per second, the sustained call rate
+            burst: Maximum number of tokens, the calls allowed back to back
+        """
+        self.rate_per_sec = rate_per_sec
+        self.burst = burst
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+    
+    async def acquire(self) -> None:
+        """
+        Wait until a token is available and take it
+        
+        The lock is released while waiting, so callers only queue behind
+        each other for the refill bookkeeping, not for the sleep.
+        """
+        while True:
+            async with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate_per_sec)
+                self._updated = now
+                
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate_per_sec
+            
+            await asyncio.sleep(wait)
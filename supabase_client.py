@@ -1,18 +1,22 @@
 import os
+import functools
 from typing import Dict, Any, List, Optional
-from dotenv import load_dotenv
 from supabase import create_client, Client
 import datetime
 import asyncio
-import json
+import orjson
+from src.utils.env import load_env
 
-load_dotenv()
+load_env()
 
-class DateTimeEncoder(json.JSONEncoder):
-    def default(self, obj):
-        if isinstance(obj, (datetime.date, datetime.datetime)):
-            return obj.isoformat()
-        return super().default(obj)
+def _serialize(payload: Dict[str, Any]) -> Dict[str, Any]:
+    """Convert a payload to JSON-compatible values.
+    
+    Datetimes become ISO 8601 strings and numpy values plain numbers;
+    orjson does this natively, several times faster than json with a
+    custom encoder.
+    """
+    return orjson.loads(orjson.dumps(payload, option=orjson.OPT_SERIALIZE_NUMPY))
 
 class SupabaseWrapper:
     def __init__(self):
@@ -27,10 +31,13 @@ class SupabaseWrapper:
         return self.client.table('cases').insert(case_data).execute()
 
     def insert_alerts(self, alerts: List[Dict[str, Any]], case_id: str) -> List[Dict[str, Any]]:
-        """Insert alerts for a case into the alerts table."""
-        for alert in alerts:
-            alert['case_id'] = case_id
-        return self.client.table('alerts').insert(alerts).execute()
+        """Insert alerts for a case into the alerts table.
+        
+        The caller's alert dicts are not mutated, so the same list can be
+        shared with the AI agent.
+        """
+        rows = [{**alert, 'case_id': case_id} for alert in alerts]
+        return self.client.table('alerts').insert(rows).execute()
 
     def insert_observables(self, observables: List[Dict[str, Any]], alert_id: str) -> List[Dict[str, Any]]:
         """Insert observables for an alert into the observables table."""
@@ -49,6 +56,44 @@ class SupabaseWrapper:
             action['case_id'] = case_id
         return self.client.table('action_items').insert(actions).execute()
 
+    def upsert_case(self, case_data: Dict[str, Any]) -> str:
+        """Insert or update a case by external ID and return its UUID."""
+        response = self.client.table('cases').upsert(case_data, on_conflict='external_id').execute()
+        return response.data[0]['id']
+
+    def store_case_bundle(
+        self,
+        case_data: Dict[str, Any],
+        alerts: List[Dict[str, Any]],
+        analysis: Optional[Dict[str, Any]] = None,
+        actions: Optional[List[Dict[str, Any]]] = None
+    ) -> str:
+        """Upsert a case with its alerts, analysis and actions in one RPC call.
+        
+        Returns:
+            str: UUID of the stored case
+        """
+        response = self.client.rpc('upsert_case_bundle', {
+            'p_case': case_data,
+            'p_alerts': alerts,
+            'p_analysis': analysis,
+            'p_actions': actions or []
+        }).execute()
+        return response.data
+
+    def store_case_bundles(self, bundles: List[Dict[str, Any]]) -> List[str]:
+        """Upsert many case bundles in one RPC call.
+        
+        Each bundle has 'case', 'alerts', 'analysis' and 'actions' keys.
+        
+        Returns:
+            List[str]: UUIDs of the stored cases, in input order
+        """
+        if not bundles:
+            return []
+        response = self.client.rpc('upsert_case_bundles', {'items': bundles}).execute()
+        return response.data
+
     def get_case_by_external_id(self, external_id: str) -> Dict[str, Any]:
         """Get a case by its external ID."""
         response = self.client.table('cases').select('*').eq('external_id', external_id).execute()
@@ -87,7 +132,7 @@ class SupabaseWrapper:
     async def create_workflow(self, workflow_data: Dict[str, Any]) -> Dict[str, Any]:
         """Create a new workflow record."""
         # Convert datetime objects to ISO format strings
-        serialized_data = json.loads(json.dumps(workflow_data, cls=DateTimeEncoder))
+        serialized_data = _serialize(workflow_data)
         serialized_data['stage_start_time'] = serialized_data['start_time']
         
         response = await self.client.table('workflows').insert(serialized_data).execute()
@@ -100,41 +145,75 @@ class SupabaseWrapper:
 
     async def update_workflow_stage(self, workflow_id: str, stage: str) -> Dict[str, Any]:
         """Update workflow stage."""
-        data = {
+        now = datetime.datetime.now()
+        data = _serialize({
             'current_stage': stage,
-            'stage_start_time': datetime.datetime.now(),
-            'last_updated': datetime.datetime.now()
-        }
+            'stage_start_time': now,
+            'last_updated': now
+        })
         response = await self.client.table('workflows').update(data).eq('id', workflow_id).execute()
         return response.data[0] if response.data else None
 
     async def update_workflow(self, workflow_id: str, update_data: Dict[str, Any]) -> Dict[str, Any]:
         """Update a workflow record."""
-        serialized_data = json.loads(json.dumps(update_data, cls=DateTimeEncoder))
+        serialized_data = _serialize(update_data)
         response = await self.client.table('workflows').update(serialized_data).eq('id', workflow_id).execute()
         return response.data[0] if response.data else None
 
     async def complete_workflow(self, workflow_id: str, status: str = 'completed', error: str = None) -> Dict[str, Any]:
         """Mark a workflow as completed or failed."""
+        now = datetime.datetime.now()
         data = {
             'status': status,
-            'completion_time': datetime.datetime.now(),
-            'last_updated': datetime.datetime.now()
+            'completion_time': now,
+            'last_updated': now
         }
         if error:
             data['error'] = error
         
-        response = await self.client.table('workflows').update(data).eq('id', workflow_id).execute()
+        response = await self.client.table('workflows').update(_serialize(data)).eq('id', workflow_id).execute()
         return response.data[0] if response.data else None
 
+    async def update_rows(self, table: str, rows: List[Dict[str, Any]], key: str) -> List[Dict[str, Any]]:
+        """Update existing rows of a table, matched on a key column.
+        
+        Rows sharing the same values apart from the key are written with one
+        update filtered on all their keys. Rows matching no existing row are
+        left alone, as with a single filtered update.
+        
+        Args:
+            table: Table to write
+            rows: Rows to update; each holds the key and the columns to set
+            key: Column identifying the row to update
+            
+        Returns:
+            List[Dict[str, Any]]: The updated rows
+        """
+        groups: Dict[bytes, tuple] = {}
+        for row in rows:
+            values = _serialize({column: value for column, value in row.items() if column != key})
+            group = groups.setdefault(orjson.dumps(values, option=orjson.OPT_SORT_KEYS), (values, []))
+            group[1].append(row[key])
+        
+        def execute() -> List[Dict[str, Any]]:
+            updated = []
+            for values, keys in groups.values():
+                response = self.client.table(table).update(values).in_(key, keys).execute()
+                updated.extend(response.data)
+            return updated
+        
+        # The Supabase client is synchronous, so run the requests off the event loop
+        return await asyncio.to_thread(execute)
+
     async def create_error_log(self, error_data: Dict[str, Any]) -> Dict[str, Any]:
         """Create an error log entry."""
-        serialized_data = json.loads(json.dumps(error_data, cls=DateTimeEncoder))
+        serialized_data = _serialize(error_data)
         response = await self.client.table('error_logs').insert(serialized_data).execute()
         return response.data[0] if response.data else None
 
     async def update_agent_metrics(self, agent_name: str, metrics: Dict[str, Any]) -> Dict[str, Any]:
         """Update agent performance metrics."""
+        metrics = _serialize(metrics)
         # Check if metrics exist for this agent
         response = await self.client.table('agent_metrics').select('*').eq('agent_name', agent_name).execute()
         
@@ -150,17 +229,17 @@ class SupabaseWrapper:
 
     async def store_agent_error(self, error_data: Dict[str, Any]) -> Dict[str, Any]:
         """Store agent error information."""
-        response = await self.client.table('agent_errors').insert(error_data).execute()
+        response = await self.client.table('agent_errors').insert(_serialize(error_data)).execute()
         return response.data[0] if response.data else None
 
     async def store_optimization_recommendations(self, optimization_data: Dict[str, Any]) -> Dict[str, Any]:
         """Store workflow optimization recommendations."""
-        response = await self.client.table('workflow_optimizations').insert(optimization_data).execute()
+        response = await self.client.table('workflow_optimizations').insert(_serialize(optimization_data)).execute()
         return response.data[0] if response.data else None
 
     async def store_stuck_workflow_analysis(self, analysis_data: Dict[str, Any]) -> Dict[str, Any]:
         """Store analysis of stuck workflows."""
-        response = await self.client.table('stuck_workflow_analysis').insert(analysis_data).execute()
+        response = await self.client.table('stuck_workflow_analysis').insert(_serialize(analysis_data)).execute()
         return response.data[0] if response.data else None
 
     async def get_agent_errors(self, agent_name: str, limit: int = 10) -> List[Dict[str, Any]]:
@@ -192,3 +271,15 @@ class SupabaseWrapper:
             'success_rate': completed / total if total > 0 else 0,
             'avg_completion_time': avg_completion_time
         }
+
+@functools.lru_cache(maxsize=1)
+def get_supabase_client() -> SupabaseWrapper:
+    """Get the process-wide Supabase client.
+    
+    Each SupabaseWrapper opens its own client and HTTP connections, so
+    callers share this one instead of constructing their own.
+    
+    Returns:
+        SupabaseWrapper: Shared Supabase client
+    """
+    return SupabaseWrapper()
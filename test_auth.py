@@ -4,7 +4,6 @@ import requests
 import base64
 import json
 from urllib.parse import urlunparse
-requests.packages.urllib3.disable_warnings()
 
 # Add credentials
 HOST = "poc.stellarcyber.cloud"
@@ -20,7 +19,7 @@ def getAccessToken(userid, refresh_token):
     url = urlunparse(("https", HOST, "/connect/api/v1/access_token", "", "", ""))
     print(f"URL: {url}")
     print(f"Headers: {json.dumps(headers, indent=2)}")
-    res = requests.post(url, headers=headers, verify=False)
+    res = requests.post(url, headers=headers)
     print(f"Status Code: {res.status_code}")
     print(f"Response: {res.text}")
     if res.status_code == 200:
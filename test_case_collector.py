@@ -5,7 +5,7 @@ from dotenv import load_dotenv
 from auth import authenticate
 from api_client import APIClient
 from case_collector import CaseCollector
-from supabase_client import SupabaseWrapper
+from supabase_client import get_supabase_client
 from ai_agent import AIAgent
 
 # Configure logging
@@ -20,7 +20,7 @@ def main():
         # Authenticate and initialize components
         logger.info("Authenticating...")
         api_client = authenticate()
-        supabase_client = SupabaseWrapper()
+        supabase_client = get_supabase_client()
         ai_agent = AIAgent()
         logger.info("Successfully authenticated!")
         
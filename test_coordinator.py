@@ -80,7 +80,9 @@ async def test_coordinator():
         # Get optimization recommendations
         logger.info("\nChecking for possible optimizations...")
         recommendations = await coordinator.optimize_workflow()
-        if recommendations.get('status') == 'optimal':
+        if recommendations.get('status') == 'idle':
+            logger.info("No optimizations needed - no stages have run yet")
+        elif recommendations.get('status') == 'optimal':
             logger.info("No optimizations needed - workflow is performing optimally")
         else:
             logger.info("Optimization Recommendations:")
@@ -102,4 +104,5 @@ async def test_coordinator():
 
 if __name__ == "__main__":
     load_dotenv()
+    CoordinatorAgent.configure_event_loop()
     asyncio.run(test_coordinator())
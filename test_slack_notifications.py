@@ -2,7 +2,7 @@ import asyncio
 import os
 from dotenv import load_dotenv
 from api_client import APIClient
-from supabase_client import SupabaseWrapper
+from supabase_client import get_supabase_client
 from ai_agent import AIAgent
 from case_collector import CaseCollector
 from auth import AuthManager
@@ -60,7 +60,7 @@ async def test_high_priority_notification():
     # Initialize components with mock API client
     auth_manager = AuthManager()
     api_client = create_mock_api_client()
-    supabase_client = SupabaseWrapper()
+    supabase_client = get_supabase_client()
     ai_agent = AIAgent()
     case_collector = CaseCollector(api_client, supabase_client, ai_agent)
     
@@ -74,6 +74,9 @@ async def test_high_priority_notification():
         print("Check the Slack channel for notification.")
     except Exception as e:
         print(f"Error during test: {str(e)}")
+    finally:
+        # Wait for the background notification to go out
+        case_collector.close()
 
 if __name__ == "__main__":
     load_dotenv()
@@ -0,0 +1,22 @@
+"""
+Unit tests for the rate-limited AI agent's capacity tracking
+"""
+import pytest
+import asyncio
+from ai_agent import RateLimitedAIAgent
+
+@pytest.fixture
+def agent(monkeypatch) -> RateLimitedAIAgent:
+    """Provide a rate-limited agent with a dummy API key"""
+    monkeypatch.setenv("OPENAI_API_KEY", "test-key")
+    return RateLimitedAIAgent(max_requests_per_minute=60, max_tokens_per_minute=1000)
+
+@pytest.mark.asyncio
+async def test_full_size_request_admitted_after_rate_limit(agent):
+    """Test that a request sized to the full quota still gets through after a 429"""
+    agent._on_rate_limited()
+    assert agent.tokens_per_minute == 500
+    
+    # The bucket is capped at the halved limit, so the estimate must be too
+    await asyncio.wait_for(agent._acquire_capacity(1000), timeout=1.0)
+    assert agent.available_token_capacity < 1
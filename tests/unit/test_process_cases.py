@@ -0,0 +1,47 @@
+"""
+Unit tests for case alert processing
+"""
+import pytest
+from unittest.mock import AsyncMock
+from scripts.process_cases import CaseProcessor
+from src.utils.rate_limiter import TokenBucket
+
+@pytest.mark.asyncio
+async def test_alert_pages_shorter_than_requested():
+    """Test that no alerts are skipped when the API returns short pages"""
+    alerts = [{'_id': str(i)} for i in range(120)]
+    
+    async def get_case_alerts(case_id, skip=0, limit=50):
+        # The API caps pages at 30 items regardless of the requested limit
+        return alerts[skip:skip + min(limit, 30)]
+    
+    processor = CaseProcessor.__new__(CaseProcessor)
+    processor.api = AsyncMock()
+    processor.api.get_case_alerts.side_effect = get_case_alerts
+    processor.supabase = AsyncMock()
+    processor._api_bucket = TokenBucket(rate_per_sec=1000, burst=1000)
+    
+    await processor.process_case_alerts({'_id': 'case-1'}, 'case-uuid')
+    
+    stored = [
+        alert
+        for call in processor.supabase.upsert_alerts_bulk.await_args_list
+        for alert in call.args[2]
+    ]
+    assert stored == alerts
+
+@pytest.mark.asyncio
+async def test_case_uuid_upserts_case_once():
+    """Test that the case is stored once and its UUID reused"""
+    processor = CaseProcessor.__new__(CaseProcessor)
+    processor.api = AsyncMock()
+    processor.api.get_case_summary.return_value = {'summary': 'text'}
+    processor.supabase = AsyncMock()
+    processor.supabase.upsert_case_data.return_value = 'case-uuid'
+    processor._api_bucket = TokenBucket(rate_per_sec=1000, burst=1000)
+    processor._case_uuid_cache = {}
+    case = {'_id': 'case-1', 'name': 'Case'}
+    
+    assert await processor._get_case_uuid(case) == 'case-uuid'
+    assert await processor._get_case_uuid(case) == 'case-uuid'
+    processor.supabase.upsert_case_data.assert_awaited_once_with('case-1', case, {'summary': 'text'})
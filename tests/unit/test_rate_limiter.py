@@ -3,7 +3,8 @@ Unit tests for rate limiter functionality
 """
 import pytest
 import asyncio
-from src.utils.rate_limiter import RateLimiter
+import time
+from src.utils.rate_limiter import RateLimiter, TokenBucket
 
 @pytest.mark.asyncio
 async def test_rate_limiter_basic():
@@ -36,3 +37,17 @@ async def test_rate_limiter_concurrent():
     
     # Only first 3 should succeed
     assert sum(results) == 3
+
+@pytest.mark.asyncio
+async def test_token_bucket_burst_then_rate():
+    """Test that a burst passes immediately and later calls wait for refill"""
+    bucket = TokenBucket(rate_per_sec=20, burst=3)
+    
+    start = time.monotonic()
+    for _ in range(3):
+        await bucket.acquire()
+    assert time.monotonic() - start < 0.05
+    
+    # Two more tokens take about 0.1s to refill at 20 per second
+    await asyncio.gather(bucket.acquire(), bucket.acquire())
+    assert time.monotonic() - start >= 0.09
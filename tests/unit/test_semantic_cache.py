@@ -0,0 +1,38 @@
+"""
+Unit tests for the semantic analysis cache
+"""
+from semantic_cache import SemanticCache
+
+def test_semantic_cache_hit_and_miss():
+    """Test that only sufficiently similar vectors hit the cache"""
+    cache = SemanticCache(threshold=0.95)
+    assert cache.lookup([1.0, 0.0]) is None
+
+    cache.add([2.0, 0.0], {"risk_level": 7})
+
+    # Same direction, different magnitude
+    assert cache.lookup([1.0, 0.01]) == {"risk_level": 7}
+    # Orthogonal vector
+    assert cache.lookup([0.0, 1.0]) is None
+
+def test_semantic_cache_eviction():
+    """Test that the oldest entries are evicted past max_entries"""
+    cache = SemanticCache(threshold=0.99, max_entries=2)
+    cache.add([1.0, 0.0, 0.0], {"id": 1})
+    cache.add([0.0, 1.0, 0.0], {"id": 2})
+    cache.add([0.0, 0.0, 1.0], {"id": 3})
+
+    assert len(cache) == 2
+    assert cache.lookup([1.0, 0.0, 0.0]) is None
+    assert cache.lookup([0.0, 0.0, 1.0]) == {"id": 3}
+
+def test_semantic_cache_persistence(tmp_path):
+    """Test saving and reloading the cache"""
+    path = str(tmp_path / "cache.npz")
+    cache = SemanticCache(path=path)
+    cache.add([0.6, 0.8], {"risk_level": 3})
+    cache.save()
+
+    reloaded = SemanticCache(path=path)
+    assert len(reloaded) == 1
+    assert reloaded.lookup([0.6, 0.8]) == {"risk_level": 3}